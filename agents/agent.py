@@ -4,6 +4,9 @@ from abc import ABC, abstractmethod
 # Local application imports
 from gym_snape import Snape
 
+# Third party imports
+import numpy as np
+
 
 class Agent(ABC):
     """Base class for all agents."""
@@ -15,3 +18,16 @@ class Agent(ABC):
     def select_action(self, *args, **kwargs) -> int:
         """How the agent makes a decision."""
         raise NotImplementedError
+
+    def select_actions(self, obs_batch, masks=None) -> np.ndarray:
+        """
+        Selects one action per observation in the batch.
+
+        Agents that can decide for a whole batch at once (see `BatchRandom`
+        and `BatchRuleBasedController`) override this; by default, it calls
+        `select_action` once per observation. The action masks of the batch
+        (see `SnapeVecEnv.action_masks`) are only used by agents that draw
+        legal actions (see `BatchMaskedRandom`); the others ignore them.
+        """
+        return np.array([self.select_action(obs) for obs in obs_batch],
+                        dtype=np.int64)
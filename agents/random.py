@@ -1,7 +1,13 @@
+# Standard library imports
+from typing import Optional
+
 # Local application imports
 from .agent import Agent
 from gym_snape import Snape
 
+# Third party imports
+import numpy as np
+
 
 class Random(Agent):
     def __init__(self, env: Snape):
@@ -13,3 +19,111 @@ class Random(Agent):
         """
         action = self._env.action_space.sample()  # take a random action
         return action
+
+
+class BatchRandom(Agent):
+    """
+    Selects uniformly random actions for a batch of environments at once.
+
+    Parameters
+    ----------
+    env: Snape
+        Any one of the environments; only its action space is used.
+
+    seed: int | None
+        Seed for the random number generator.
+    """
+
+    def __init__(self, env: Snape, seed: Optional[int] = None):
+        super().__init__(env)
+        self._rng = np.random.default_rng(seed)
+
+    def select_action(self, obs) -> int:
+        """
+        Selects an action based on the given observation.
+        """
+        return int(self._rng.integers(self._env.action_space.n))
+
+    def select_actions(self, obs_batch, masks=None) -> np.ndarray:
+        """
+        Selects one action per observation in the batch. The action masks, if
+        any, are ignored; they are accepted so that this agent can be swapped
+        with `BatchMaskedRandom`.
+        """
+        return self._rng.integers(self._env.action_space.n, size=len(obs_batch))
+
+
+class MaskedRandom(Agent):
+    """
+    Selects actions uniformly at random among the legal actions of the
+    environment (see `Snape.action_mask`).
+
+    Parameters
+    ----------
+    env: Snape
+        The environment to take the action mask from.
+
+    seed: int | None
+        Seed for the random number generator.
+    """
+
+    def __init__(self, env: Snape, seed: Optional[int] = None):
+        super().__init__(env)
+        self._rng = np.random.default_rng(seed)
+
+    def select_action(self, obs) -> int:
+        """
+        Selects an action based on the given observation.
+        """
+        legal = np.flatnonzero(self._env.action_mask())
+        return int(legal[self._rng.integers(len(legal))])
+
+
+class BatchMaskedRandom(Agent):
+    """
+    Selects uniformly random legal actions for a batch of environments at
+    once.
+
+    Parameters
+    ----------
+    env: Snape
+        Any one of the environments. Its action space is used, and its action
+        mask by `select_action` when no mask is given.
+
+    seed: int | None
+        Seed for the random number generator.
+    """
+
+    def __init__(self, env: Snape, seed: Optional[int] = None):
+        super().__init__(env)
+        self._rng = np.random.default_rng(seed)
+
+    def select_action(self, obs, mask=None) -> int:
+        """
+        Selects an action based on the given observation and action mask.
+        """
+        if mask is None:
+            mask = self._env.action_mask()
+        return int(self.select_actions([obs], np.asarray(mask)[None])[0])
+
+    def select_actions(self, obs_batch, masks=None) -> np.ndarray:
+        """
+        Selects one action per observation in the batch.
+
+        Parameters
+        ----------
+        obs_batch: Sequence
+            The observations; only their number is used.
+
+        masks: np.ndarray | None
+            Boolean array of shape (batch size, number of actions), where row
+            i is the action mask of the environment of observation i (see
+            `Snape.action_mask`). If None, every action is considered legal.
+        """
+        shape = (len(obs_batch), self._env.action_space.n)
+        # The argmax of uniform random keys is a uniform choice; masked out
+        # actions get a key below any legal action's key
+        keys = self._rng.random(shape)
+        if masks is not None:
+            keys = np.where(masks, keys, -1.0)
+        return keys.argmax(axis=1)
@@ -1,6 +1,11 @@
+# Standard library imports
+from typing import Optional
+
 # Local application imports
 from .agent import Agent
 from gym_snape import Snape
+from gym_snape.env import (DECK_FIELDS, SCALAR_FIELDS, SHOP_FIELDS,
+                           LazyView, split_flat_obs)
 
 # Third party imports
 import numpy as np
@@ -72,8 +77,101 @@ class RuleBasedController(Agent):
         if action == -1 or same_deck or same_shop:
             action = self._env.action_space.sample()  # take a random action
 
-        # Track previous observation deck/space
-        self._prev_deck = obs['deck']
-        self._prev_shop = obs['shop']
+        # Track previous observation deck/space; lazy observations follow the
+        # live game, so they are snapshotted
+        deck, shop = obs['deck'], obs['shop']
+        if isinstance(deck, LazyView):
+            deck, shop = deck.materialize(), shop.materialize()
+        self._prev_deck = deck
+        self._prev_shop = shop
 
         return action
+
+
+class BatchRuleBasedController(Agent):
+    """
+    The same rules as `RuleBasedController`, applied to a batch of flat
+    observations (see `Snape`'s `obs_mode`) at once.
+
+    The agent keeps the previous observation of every row of the batch, so
+    row i of each batch must always come from the same environment.
+
+    Parameters
+    ----------
+    env: Snape
+        Any one of the environments; only its action ranges are used.
+
+    seed: int | None
+        Seed for the random number generator.
+    """
+
+    def __init__(self, env: Snape, seed: Optional[int] = None):
+        super().__init__(env)
+        self._rng = np.random.default_rng(seed)
+        self._prev_obs = None
+
+    def select_action(self, obs) -> int:
+        """
+        Selects an action based on the given flat observation.
+        """
+        return int(self.select_actions(np.asarray(obs)[None])[0])
+
+    def select_actions(self, obs_batch, masks=None) -> np.ndarray:
+        """
+        Selects one action per flat observation in the batch. The action
+        masks, if any, are ignored (see `Agent.select_actions`).
+        """
+        env = self._env
+        obs_batch = np.asarray(obs_batch)
+        n = len(obs_batch)
+        scalars, deck, shop = split_flat_obs(obs_batch)
+        gold = scalars[:, SCALAR_FIELDS.index('n_gold')]
+        turns = scalars[:, SCALAR_FIELDS.index('n_turns')]
+        deck_type = deck[:, :, DECK_FIELDS.index('type')]
+        shop_type = shop[:, :, SHOP_FIELDS.index('type')]
+        shop_health = shop[:, :, SHOP_FIELDS.index('health')]
+        actions = np.full(n, -1, dtype=np.int64)
+
+        # If out of gold, begin battle
+        actions[gold == 0] = env.end_turn_action
+
+        # If less than 3 gold, randomly decide to freeze or roll shop
+        low = (gold > 0) & (gold < 3)
+        roll = self._rng.integers(2, size=n) == 0
+        freeze_index = self._rng.integers(shop.shape[1], size=n)
+        actions[low & roll] = env.roll_action
+        freeze = low & ~roll
+        actions[freeze] = env.freeze_actions.start + freeze_index[freeze]
+
+        # If we can buy something and the turn number is less than 9, buy the
+        # pet with the highest health into the first empty slot, or sell a
+        # random pet if the deck is full
+        shopping = (gold >= 3) & (turns < 9)
+        is_empty = deck_type == env.IS_EMPTY
+        has_empty = is_empty.any(axis=1)
+        deck_index = is_empty.argmax(axis=1)
+        health = np.where(shop_type == env.IS_PET, shop_health, 0)
+        shop_index = health.argmax(axis=1)
+        found = health.max(axis=1) > 0
+        buy = shopping & has_empty & found
+        actions[buy] = (env.buy_actions.start +
+                        shop_index[buy] * deck.shape[1] + deck_index[buy])
+        sell = shopping & ~has_empty
+        keys = np.where(deck_type == env.IS_PET,
+                        self._rng.random(deck_type.shape), -1)
+        actions[sell] = env.sell_actions.start + keys[sell].argmax(axis=1)
+
+        # Action was not explicitly selected or deck/shop did not change
+        unchanged = np.zeros(n, dtype=bool)
+        if self._prev_obs is not None and len(self._prev_obs) == n:
+            _, prev_deck, prev_shop = split_flat_obs(self._prev_obs)
+            unchanged = ((deck == prev_deck).all(axis=(1, 2)) |
+                         (shop == prev_shop).all(axis=(1, 2)))
+        fallback = (actions == -1) | unchanged
+        actions[fallback] = self._rng.integers(env.action_space.n,
+                                               size=fallback.sum())
+
+        # Track previous observations
+        self._prev_obs = obs_batch.copy()
+
+        return actions
@@ -0,0 +1,61 @@
+"""
+Profiles the pet abilities triggered in battles on the fixed deck corpora.
+
+Prints one row per pet class and ability, sorted by the chosen column, followed
+by the distribution of ability cascade depths. See `gym_snape.game.profiling`.
+"""
+
+# Standard library imports
+from argparse import ArgumentParser
+
+# Local application imports
+from gym_snape.game import Game, profiling
+from corpora import CORPORA, encode_corpus, load_tapes
+
+
+def main(names, n_battles: int, sort_by: str, output, seed: int):
+    """
+    Parameters
+    ----------
+    names: list
+        Names of the corpora to battle on.
+    n_battles: int
+        The number of battles per corpus.
+    sort_by: str
+        The column to sort the report by.
+    output: str | None
+        If given, the report is also written to this CSV file.
+    seed: int
+        Seed for the games and the tapes of the abilities' random choices.
+    """
+    with profiling.profile() as profiler:
+        for name in names:
+            decks = encode_corpus(name, seed)
+            tapes = load_tapes(name, seed)
+            for i in range(n_battles):
+                game = Game.from_bytes(decks[i % len(decks)])
+                opponent = Game.from_bytes(decks[(i + 1) % len(decks)])
+                tape = tapes[i % len(decks)]
+                tape.rewind()
+                with tape.replaying():
+                    game.challenge(opponent)
+
+    print(profiler.format(sort_by=sort_by))
+    if output:
+        profiler.write_csv(output, sort_by=sort_by)
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Profile pet abilities in battles on the deck corpora.')
+    parser.add_argument('--corpus', nargs='+', choices=list(CORPORA.keys()),
+                        default=list(CORPORA.keys()))
+    parser.add_argument('--battles', type=int, default=500)
+    parser.add_argument('--sort', default='seconds',
+                        choices=['pet', 'ability', 'triggers', 'calls',
+                                 'duplicates', 'seconds', 'mean'])
+    parser.add_argument('--output', help='write the report to this CSV file')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    main(args.corpus, args.battles, args.sort, args.output, args.seed)
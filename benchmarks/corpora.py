@@ -0,0 +1,164 @@
+"""
+Fixed deck corpora for battle benchmarks.
+
+Each corpus is a list of decks, and each deck is a tuple of pet classes placed
+into deck slots 0, 1, 2, ... in order. Battles pair every deck with the next
+one in the same corpus.
+
+Each corpus is stored with the random tapes of its battles (see
+`gym_snape.game.draws`), one per pair of decks, in `tapes/`. Replaying them
+makes every version of the game draw the same ability targets and shops, so
+benchmarks compare the same code path. Record them again if the game's draws
+change:
+
+>>> python benchmarks/corpora.py
+"""
+
+# Standard library imports
+from argparse import ArgumentParser
+import os
+from typing import Dict, List, Sequence, Tuple
+
+# Local application imports
+from gym_snape.game import Game
+from gym_snape.game.draws import RandomTape
+from gym_snape.game.pets.tier1 import *
+from gym_snape.game.pets.tier2 import *
+from gym_snape.game.pets.tier3 import *
+from gym_snape.game.pets.tier4 import *
+from gym_snape.game.pets.tier5 import *
+from gym_snape.game.pets.tier6 import *
+
+# Third party imports
+import numpy as np
+
+# Pets whose abilities (if any) do not damage, summon, or faint other pets
+VANILLA = [
+    (Fish, Pig, Beaver, Otter, Sloth),
+    (Horse, Fish, Crab, Dodo, Swan),
+    (Bison, Hippo, Fish, Pig, Horse),
+    (Crab, Dodo, Swan, Rabbit, Camel),
+    (Cow, Rhino, Bison, Hippo, Giraffe),
+    (Boar, Crab, Pig, Sloth, Fish),
+]
+
+# Pets that damage others when hurt or fainting, setting off chains of faints
+FAINT_CASCADE = [
+    (Badger, BlowFish, Hedgehog, Ant, Flamingo),
+    (Hedgehog, Badger, Peacock, BlowFish, Mammoth),
+    (BlowFish, Hedgehog, Camel, Badger, Ant),
+    (Mammoth, Badger, Hedgehog, Flamingo, BlowFish),
+    (Ant, Flamingo, Hedgehog, Badger, Peacock),
+    (Badger, Hedgehog, Mammoth, BlowFish, Camel),
+]
+
+# Pets that summon tokens or other pets when fainting
+SUMMON = [
+    (Sheep, Fly, Cricket, Spider, Turkey),
+    (Cricket, Sheep, Deer, Rat, Horse),
+    (Spider, Rooster, Sheep, Cricket, Deer),
+    (Rat, Cricket, Deer, Spider, Turkey),
+    (Deer, Sheep, Rooster, Fly, Cricket),
+    (Sheep, Spider, Rat, Deer, Rooster),
+]
+
+CORPORA: Dict[str, List[Tuple]] = {
+    'vanilla': VANILLA,
+    'faint_cascade': FAINT_CASCADE,
+    'summon': SUMMON,
+}
+
+
+def make_game(deck: Sequence, seed: int = 0) -> Game:
+    """
+    Creates a game whose deck holds fresh pets of the given classes.
+
+    The pets are placed through the deck, so their on summon abilities are
+    triggered just as if they had been bought.
+    """
+    game = Game()
+    game.reset(seed)
+    for i, cls in enumerate(deck):
+        pet = cls()
+        pet.assign_game(game)
+        pet.assign_shop(game.shop)
+        game.deck[i] = pet
+    return game
+
+
+def encode_corpus(name: str, seed: int = 0) -> List[bytes]:
+    """Returns every deck of the named corpus as an encoded game state."""
+    np.random.seed(seed)
+    return [make_game(deck, seed).to_bytes() for deck in CORPORA[name]]
+
+
+# Where the tapes of the corpora are stored
+TAPE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tapes')
+
+
+def tape_path(name: str, seed: int = 0) -> str:
+    """Returns the path of the tapes of the named corpus."""
+    return os.path.join(TAPE_DIR, f'{name}_{seed}.npz')
+
+
+def record_tapes(name: str, seed: int = 0) -> List[RandomTape]:
+    """
+    Battles every deck of the named corpus against the next one, and returns
+    the random tape of each battle. The same seed always records the same
+    tapes.
+    """
+    decks = encode_corpus(name, seed)
+    np.random.seed(seed)
+    tapes = []
+    for i in range(len(decks)):
+        game = Game.from_bytes(decks[i])
+        opponent = Game.from_bytes(decks[(i + 1) % len(decks)])
+        # Decoded games have unseeded shops, which roll after the battle
+        game.shop.rng = np.random.default_rng([seed, i, 0])
+        opponent.shop.rng = np.random.default_rng([seed, i, 1])
+        tape = RandomTape()
+        with tape.recording():
+            game.challenge(opponent)
+        tapes.append(tape)
+    return tapes
+
+
+def load_tapes(name: str, seed: int = 0) -> List[RandomTape]:
+    """
+    Returns the stored tapes of the named corpus, one per battle of a deck
+    against the next one.
+
+    Raises
+    ----------
+    FileNotFoundError if no tapes are stored for the corpus and seed (see
+    `save_tapes`).
+    """
+    path = tape_path(name, seed)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f'no tapes are stored for corpus {name!r} with seed {seed}; '
+            f'record them with: python benchmarks/corpora.py '
+            f'--corpus {name} --seed {seed}')
+    with np.load(path) as stored:
+        return [RandomTape(stored[f'arr_{i}'])
+                for i in range(len(stored.files))]
+
+
+def save_tapes(name: str, seed: int = 0):
+    """Records the tapes of the named corpus and stores them."""
+    os.makedirs(TAPE_DIR, exist_ok=True)
+    tapes = record_tapes(name, seed)
+    np.savez_compressed(tape_path(name, seed), *[tape.data for tape in tapes])
+    print(f'{name:<14} {sum(len(tape) for tape in tapes):>6} draws')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Record the random tapes of the deck corpora.')
+    parser.add_argument('--corpus', nargs='+', choices=list(CORPORA.keys()),
+                        default=list(CORPORA.keys()))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for name in args.corpus:
+        save_tapes(name, args.seed)
@@ -0,0 +1,114 @@
+"""
+Measures how much work the cyclic garbage collector does while playing games.
+
+Games that are discarded (e.g., by `Snape.reset`) should be freed by reference
+counting alone. This benchmark reports the number of objects that were only
+reclaimable by the cyclic collector, along with the number and duration of the
+collections that ran, per generation. Run it on two revisions to compare them.
+"""
+
+# Standard library imports
+from argparse import ArgumentParser
+from collections import Counter
+import gc
+import time
+from typing import Tuple
+
+# Local application imports
+from gym_snape import Snape
+from suite import ABILITY_ERRORS
+
+# Third party imports
+import numpy as np
+
+
+def make_pair() -> Tuple[Snape, Snape]:
+    """Returns two cross-wired environments."""
+    env1, env2 = Snape(validation='off'), Snape(validation='off')
+    env1.assign_opponent(env2)
+    env2.assign_opponent(env1)
+    return env1, env2
+
+
+def play(env1: Snape, env2: Snape, n_resets: int, steps_per_game: int,
+         seed: int) -> Counter:
+    """
+    Plays random games between two cross-wired environments, and returns the
+    number of steps that raised one of `suite.ABILITY_ERRORS`, per exception
+    type.
+
+    An error can leave a battle half fought, after which the games cannot be
+    reset, so the game is abandoned and played on with a new pair.
+    """
+    rng = np.random.default_rng(seed)
+    errors = Counter()
+    for _ in range(n_resets):
+        for _ in range(steps_per_game):
+            try:
+                for env in (env1, env2):
+                    env.step(int(rng.integers(env.action_space.n)))
+            except ABILITY_ERRORS as e:
+                errors[type(e).__name__] += 1
+                env1, env2 = make_pair()
+        env1.reset()
+        env2.reset()
+    return errors
+
+
+def main(n_resets: int, steps_per_game: int, seed: int):
+    """
+    Parameters
+    ----------
+    n_resets: int
+        The number of times each environment is reset.
+    steps_per_game: int
+        The number of random actions taken by each player between resets.
+    seed: int
+        Seed for the random actions.
+    """
+    env1, env2 = make_pair()
+
+    # Count the objects that only the cyclic collector can reclaim
+    gc.collect()
+    gc.disable()
+    errors = play(env1, env2, n_resets, steps_per_game, seed)
+    n_cyclic = gc.collect()
+    gc.enable()
+
+    # Time the collections that run during normal operation
+    pauses = {0: [], 1: [], 2: []}
+    start = [0.0]
+
+    def callback(phase, info):
+        if phase == 'start':
+            start[0] = time.perf_counter()
+        else:
+            pauses[info['generation']].append(time.perf_counter() - start[0])
+
+    gc.collect()
+    gc.callbacks.append(callback)
+    t0 = time.perf_counter()
+    errors.update(play(env1, env2, n_resets, steps_per_game, seed))
+    elapsed = time.perf_counter() - t0
+    gc.callbacks.remove(callback)
+
+    print(f'Objects reclaimed only by the cyclic collector: {n_cyclic}')
+    print(f'Total run time: {elapsed:.3f} s')
+    print(f'Steps that raised an error: {sum(errors.values())} '
+          f'{dict(errors)}')
+    for generation, times in pauses.items():
+        total = sum(times)
+        longest = max(times, default=0.0)
+        print(f'gen {generation}: {len(times):6d} collections, '
+              f'{total * 1e3:9.3f} ms total, {longest * 1e3:7.3f} ms max')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Measure garbage collection pauses during self-play.')
+    parser.add_argument('--resets', type=int, default=200)
+    parser.add_argument('--steps', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    main(args.resets, args.steps, args.seed)
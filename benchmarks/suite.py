@@ -0,0 +1,269 @@
+"""
+Benchmark suite for the game logic and the environment.
+
+Each scenario is run several times and its throughput (operations per second)
+is written to a JSON file. A previous result file can be given as a baseline,
+in which case scenarios that got slower by more than the tolerance are reported
+and the script exits with a non-zero status. Random play can still run into
+abilities that raise (see `ABILITY_ERRORS`); such steps are counted by
+exception type and reported with the results. Any other exception is raised.
+
+Example
+----------
+>>> python benchmarks/suite.py --output baseline.json
+>>> python benchmarks/suite.py --output current.json --compare baseline.json
+"""
+
+# Standard library imports
+from argparse import ArgumentParser
+from collections import Counter
+from collections.abc import Callable
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Local application imports
+from gym_snape import Snape
+from gym_snape.game import Game
+from corpora import encode_corpus, load_tapes
+
+# Third party imports
+import numpy as np
+
+# The exceptions that some pet abilities are known to raise in some states
+# (e.g., when their target has fainted). Random play runs into them now and
+# then; anything else is a bug, and is not caught by the benchmarks.
+ABILITY_ERRORS = (AttributeError, TypeError)
+
+# A scenario performs `n` operations and returns the number of operations, the
+# time (in seconds) they took, excluding any setup, and the number of
+# operations that raised an error, per exception type
+Scenario = Callable[[int, int], Tuple[int, float, Counter]]
+
+
+def play_random(envs: List[Snape], actions: np.ndarray, seed: int) -> Counter:
+    """
+    Steps a pair of cross-wired environments with the given random actions,
+    and returns the number of steps that raised one of `ABILITY_ERRORS`, per
+    exception type.
+
+    An error can leave a battle half fought, after which the games cannot be
+    reset, so the pair is replaced by a new one (see `make_pair`).
+    """
+    errors = Counter()
+    for actions_of_pair in actions:
+        for i, action in enumerate(actions_of_pair):
+            try:
+                _, _, done, _ = envs[i].step(int(action))
+            except ABILITY_ERRORS as e:
+                errors[type(e).__name__] += 1
+                envs[:] = make_pair(seed + sum(errors.values()))
+                break
+            if done:
+                envs[i].reset()
+    return errors
+
+
+def make_pair(seed: int) -> Tuple[Snape, Snape]:
+    """Returns two freshly seeded, cross-wired environments."""
+    np.random.seed(seed)
+    env1, env2 = Snape(validation='off'), Snape(validation='off')
+    env1.assign_opponent(env2)
+    env2.assign_opponent(env1)
+    env1.reset(seed)
+    env2.reset(seed + 1)
+    return env1, env2
+
+
+def bench_step(n: int, seed: int) -> Tuple[int, float, Counter]:
+    """Random-policy `Snape.step` throughput, in steps."""
+    envs = list(make_pair(seed))
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(envs[0].action_space.n, size=(n // 2, 2))
+    start = time.perf_counter()
+    errors = play_random(envs, actions, seed)
+    return 2 * len(actions), time.perf_counter() - start, errors
+
+
+def bench_roll(n: int, seed: int) -> Tuple[int, float, Counter]:
+    """`Game.roll` throughput, in rolls."""
+    game = Game()
+    game.reset(seed)
+    start = time.perf_counter()
+    for _ in range(n):
+        game.roll(is_turn_start=True)
+    return n, time.perf_counter() - start, Counter()
+
+
+def bench_battle(corpus: str) -> Scenario:
+    """
+    `Game.challenge` throughput on a deck corpus, in battles.
+
+    Every battle replays the stored tape of its pair of decks, so the same
+    draws are made whatever the version of the game.
+    """
+    def _impl(n: int, seed: int) -> Tuple[int, float, Counter]:
+        decks = encode_corpus(corpus, seed)
+        tapes = load_tapes(corpus, seed)
+        pairs = [(Game.from_bytes(decks[i % len(decks)]),
+                  Game.from_bytes(decks[(i + 1) % len(decks)]),
+                  tapes[i % len(decks)])
+                 for i in range(n)]
+        start = time.perf_counter()
+        for game, opponent, tape in pairs:
+            tape.rewind()
+            with tape.replaying():
+                game.challenge(opponent)
+        return n, time.perf_counter() - start, Counter()
+    return _impl
+
+
+def bench_reset(n: int, seed: int) -> Tuple[int, float, Counter]:
+    """`Snape.reset` throughput, in resets."""
+    env = Snape(validation='off')
+    env.reset(seed)
+    start = time.perf_counter()
+    for _ in range(n):
+        env.reset()
+    return n, time.perf_counter() - start, Counter()
+
+
+def bench_get_obs(n: int, seed: int) -> Tuple[int, float, Counter]:
+    """`Snape._get_obs` throughput on a mid-game state, in observations."""
+    envs = list(make_pair(seed))
+    rng = np.random.default_rng(seed)
+    actions = rng.integers(envs[0].action_space.n, size=(200, 2))
+    play_random(envs, actions, seed)
+    start = time.perf_counter()
+    for _ in range(n):
+        envs[0]._get_obs()
+    return n, time.perf_counter() - start, Counter()
+
+
+# Scenario names mapped to the scenario and its default number of operations
+SCENARIOS: Dict[str, Tuple[Scenario, int]] = {
+    'step_random': (bench_step, 20_000),
+    'roll': (bench_roll, 20_000),
+    'battle_vanilla': (bench_battle('vanilla'), 2_000),
+    'battle_faint_cascade': (bench_battle('faint_cascade'), 2_000),
+    'battle_summon': (bench_battle('summon'), 2_000),
+    'reset': (bench_reset, 10_000),
+    'get_obs': (bench_get_obs, 20_000),
+}
+
+
+def run(names, repeat: int, scale: float, seed: int) -> Dict:
+    """Runs the named scenarios and returns their results."""
+    results = {}
+    for name in names:
+        scenario, n = SCENARIOS[name]
+        n = max(1, int(n * scale))
+        rates = []
+        errors = Counter()
+        for _ in range(repeat):
+            ops, seconds, run_errors = scenario(n, seed)
+            rates.append(ops / seconds)
+            errors.update(run_errors)
+        results[name] = {
+            'ops': n,
+            'ops_per_sec': statistics.median(rates),
+            'best_ops_per_sec': max(rates),
+            'runs': rates,
+            'errors': dict(errors),
+        }
+        summary = ', '.join(f'{n_errors} {error}'
+                            for error, n_errors in sorted(errors.items()))
+        summary = f'  ({summary})' if summary else ''
+        print(f'{name:<22} {results[name]["ops_per_sec"]:>14,.1f} ops/s'
+              f'{summary}')
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> bool:
+    """
+    Prints the change of each scenario relative to the baseline.
+
+    Returns True if no scenario got slower by more than `tolerance` (e.g., 0.1
+    for 10%), False otherwise.
+    """
+    ok = True
+    print(f'\n{"scenario":<22} {"baseline":>14} {"current":>14} {"change":>8}')
+    for name, result in results.items():
+        if name not in baseline:
+            print(f'{name:<22} {"-":>14} {result["ops_per_sec"]:>14,.1f}')
+            continue
+        before = baseline[name]['ops_per_sec']
+        after = result['ops_per_sec']
+        change = after / before - 1
+        flag = ''
+        if change < -tolerance:
+            flag = '  REGRESSION'
+            ok = False
+        print(f'{name:<22} {before:>14,.1f} {after:>14,.1f} '
+              f'{change:>+8.1%}{flag}')
+    return ok
+
+
+def main(output: Optional[str], baseline: Optional[str], tolerance: float,
+         only: Optional[list], repeat: int, scale: float, seed: int) -> int:
+    """
+    Parameters
+    ----------
+    output: str | None
+        Path of the JSON file to write the results to.
+    baseline: str | None
+        Path of a JSON file written by a previous run to compare against.
+    tolerance: float
+        Allowed relative slowdown before a scenario counts as a regression.
+    only: list | None
+        Names of the scenarios to run. Default is None, which runs all.
+    repeat: int
+        Number of runs per scenario; the median throughput is reported.
+    scale: float
+        Multiplier for the number of operations per run.
+    seed: int
+        Seed for the environments, games, and random actions.
+    """
+    names = only if only else list(SCENARIOS.keys())
+    results = run(names, repeat, scale, seed)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'repeat': repeat,
+            'scale': scale,
+            'seed': seed,
+        },
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)['results']
+        if not compare(results, previous, tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmark the game and environment.')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', dest='baseline',
+                        help='compare against this JSON result file')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    parser.add_argument('--only', nargs='+', choices=list(SCENARIOS.keys()))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    sys.exit(main(args.output, args.baseline, args.tolerance, args.only,
+                  args.repeat, args.scale, args.seed))
@@ -1,77 +1,35 @@
-"""Example usage of SNAPE with simple agents. Also useful for degbugging."""
+"""
+Example usage of SNAPE with simple agents. Also useful for debugging.
+
+Plays one game with the match runner of `run_matches.py` and prints the final
+state of both games. To play many games in parallel and get win rates, use
+`run_matches.py` directly.
+"""
 
 # Standard library imports
 from argparse import ArgumentParser
 from typing import Optional
-import time
 
 # Local application imports
-from agents.random import Random
-from agents.rbc import RuleBasedController as RBC
-from gym_snape import Snape
+from run_matches import AGENTS, ERROR, MAX_ACTIONS, play
 
 
-def main(agent_type: str, max_actions: Optional[int] = None):
+def main(agent_type: str, max_actions: Optional[int] = None, seed: int = 0):
     """
     Parameters
     ----------
     agent_type: str
-        What type of agent to use: random or rule-based controller.
+        What type of agent to use: random, masked random (only legal
+        actions), or rule-based controller (see `run_matches.AGENTS`).
     max_actions: int
         The max number of actions to allow. Default is None, which means the
         agents will compete until one wins.
+    seed: int
+        The seed of the game (see `run_matches.play`).
     """
-    # Initialize player 1 and their environment
-    env1 = Snape()
-    obs1 = env1.reset()
-    if agent_type == 'random':
-        p1 = Random(env1)
-    elif agent_type == 'rbc':
-        p1 = RBC(env1)
-    else:
-        raise NotImplementedError(
-            f'agent type {agent_type} is not implemented')
-
-    # Initialize player 2 and their environment
-    env2 = Snape()
-    obs2 = env2.reset()
-    if agent_type == 'random':
-        p2 = Random(env2)
-    elif agent_type == 'rbc':
-        p2 = RBC(env2)
-    else:
-        raise NotImplementedError(
-            f'agent type {agent_type} is not implemented')
-
-    # Assign opponent
-    env1.assign_opponent(env2)
-    env2.assign_opponent(env1)
-
     # Have the agents compete (each can force the other to battle whenever)
-    done = False
-    while not done:
-        try:
-            # Player 1 acts
-            act1 = p1.select_action(obs1)
-            n_actions1 = obs1['n_actions']
-            obs1, rew1, done1, info1 = env1.step(act1)
-
-            # Player 2 acts
-            act2 = p2.select_action(obs2)
-            n_actions2 = obs2['n_actions']
-            obs2, rew2, done2, info2 = env2.step(act2)
-
-            # Check game over conditions
-            if max_actions:
-                max_actions_exceeded = n_actions1 > max_actions or n_actions2 > max_actions
-            else:
-                max_actions_exceeded = False
-            done = done1 or done2 or max_actions_exceeded
-        except KeyboardInterrupt:
-            break
-        except Exception as e:
-            print(e)
-            break
+    env1, env2, steps, status = play(seed, agent_type, agent_type,
+                                     max_actions)
 
     # View results
     print('PLAYER 1')
@@ -80,12 +38,19 @@ def main(agent_type: str, max_actions: Optional[int] = None):
     print('PLAYER 2')
     print(env2.game)
 
+    if status == MAX_ACTIONS:
+        print(f'Stopped after {steps} actions per player')
+    elif status == ERROR:
+        print(f'A pet ability raised an error after {steps} actions')
+
 
 if __name__ == '__main__':
     parser = ArgumentParser(
         description='Example usage of SNAPE with simple agents.')
-    parser.add_argument('--agent', choices=['random', 'rbc'], default='random')
+    parser.add_argument('--agent', choices=list(AGENTS.keys()),
+                        default='random')
     parser.add_argument('--max_actions', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
     args = parser.parse_args()
 
-    main(args.agent, args.max_actions)
+    main(args.agent, args.max_actions, args.seed)
@@ -1,8 +1,39 @@
-from gym.envs.registration import register
+# Standard library imports
+import inspect
+
+# Third party imports
+from gym.envs.registration import EnvSpec, register
+
+# Local application imports
 from gym_snape.env import Snape
+from gym_snape.duel import SnapeDuel
+from gym_snape.lobby import SnapeLobby
+from gym_snape.vec_env import SnapeVecEnv
+
+# The environment checker (gym 0.24 and later) expects single-agent
+# observations; older versions of gym have no checker to disable
+_NO_CHECKER = {}
+if 'disable_env_checker' in inspect.signature(EnvSpec).parameters:
+    _NO_CHECKER['disable_env_checker'] = True
 
 id = 'snape-v0'
 register(
     id=id,
     entry_point='gym_snape:Snape',
 )
+register(
+    id='snape-duel-v0',
+    entry_point='gym_snape:SnapeDuel',
+    # The checker would mistake the pair of observations for (obs, info)
+    **_NO_CHECKER,
+)
+register(
+    id='snape-lobby-v0',
+    entry_point='gym_snape:SnapeLobby',
+    **_NO_CHECKER,
+)
+register(
+    id='snape-vec-v0',
+    entry_point='gym_snape:SnapeVecEnv',
+    **_NO_CHECKER,
+)
@@ -0,0 +1,189 @@
+"""
+A two-player environment in which both players act simultaneously.
+
+Cross-wiring two `Snape` environments with `assign_opponent` lets either
+player force a battle whenever they end their turn, even if the other player
+is still shopping. `SnapeDuel` instead keeps a separate shop phase for each
+player: ending the turn only marks the player as ready, and the battle is
+fought exactly once, when both players are ready. Both players are stepped by
+a single call, which returns both observations.
+
+Example
+----------
+>>> env = SnapeDuel()
+>>> p1 = MaskedRandom(env.players[0])
+>>> p2 = MaskedRandom(env.players[1])
+>>> obs1, obs2 = env.reset()
+>>> done = False
+>>> while not done:
+...     actions = (p1.select_action(obs1), p2.select_action(obs2))
+...     (obs1, obs2), rewards, done, info = env.step(actions)
+"""
+
+__all__ = ['SnapeDuel']
+
+# Standard library imports
+from typing import Optional, Tuple
+
+# Local application imports
+from gym_snape.env import Snape
+
+# Third party imports
+import gym
+from gym import spaces
+import numpy as np
+
+
+class SnapeDuel(gym.Env):
+    """
+    Two players, each with their own game, who shop simultaneously and battle
+    each other once both have ended their turn.
+
+    Each step takes one action per player, in the action space of `Snape`.
+    Once a player has ended their turn, they wait for the other player: their
+    actions are ignored (any action may be passed, e.g. the end turn action)
+    until the battle has been fought.
+
+    Parameters
+    ----------
+    display: bool
+        If True, the games are printed as they are played.
+
+    timing: bool
+        If True, the phases of each player's game are timed (see `Snape`).
+
+    obs_mode: str
+        The observation mode of both players (see `Snape`).
+
+    Attributes
+    ----------
+    players: Tuple[Snape, Snape]
+        The environments of the two players. Agents that need an environment
+        (e.g., to read its action mask) should be given these. They must not
+        be stepped directly, though, as they have no opponent assigned.
+    """
+    metadata = {'render.modes': ['ansi']}
+
+    def __init__(self, display: bool = False, timing: bool = False,
+                 obs_mode: str = 'dict'):
+        super().__init__()
+        self.players = (
+            Snape(display=display, timing=timing, obs_mode=obs_mode),
+            Snape(display=display, timing=timing, obs_mode=obs_mode),
+        )
+        self.end_turn_action = self.players[0].end_turn_action
+        self._ready = [False, False]
+
+        self.action_space = spaces.Tuple(
+            [player.action_space for player in self.players])
+        self.observation_space = spaces.Tuple(
+            [player.observation_space for player in self.players])
+
+    @property
+    def ready(self) -> Tuple[bool, bool]:
+        """Whether each player has ended their turn and is waiting to
+        battle."""
+        return tuple(self._ready)
+
+    def action_masks(self) -> np.ndarray:
+        """
+        Returns the legal actions of both players as a boolean array of shape
+        (2, number of actions). A player who is waiting to battle may only end
+        their turn.
+        """
+        masks = np.zeros((2, self.action_space[0].n), dtype=bool)
+        for i, player in enumerate(self.players):
+            if self._ready[i]:
+                masks[i, self.end_turn_action] = True
+            else:
+                masks[i] = player.action_mask()
+        return masks
+
+    def step(self, actions):
+        """
+        Parameters
+        ----------
+        actions: Tuple[int, int]
+            The actions of player 1 and player 2.
+
+        Returns
+        ----------
+        The observations of both players, a (2,) array of their rewards, the
+        done flag, and a dict of diagnostic information. `info['success']`
+        flags, per player, whether their action had its intended effect
+        (always False for a waiting player). `info['battle']` is present on
+        the step the battle was fought.
+        """
+        # Check that actions are valid
+        assert self.action_space.contains(tuple(actions)), \
+            f'Actions {actions} are invalid; action space is {self.action_space}'
+
+        rewards = np.zeros(2, dtype=np.float32)
+        success = np.zeros(2, dtype=bool)
+        for i, (player, action) in enumerate(zip(self.players, actions)):
+            if self._ready[i] or player.game.game_over:
+                continue
+
+            # Small negative reward for each action taken
+            rewards[i] = -1
+            if action == self.end_turn_action:
+                self._ready[i] = True
+                success[i] = True
+            else:
+                success[i] = player._apply_action(int(action))
+
+        # Battle once both players are ready
+        game1, game2 = self.players[0].game, self.players[1].game
+        battled = all(self._ready)
+        if battled:
+            game1.challenge(game2)
+            self._ready = [False, False]
+
+        # Get new observations and check for end-of-game
+        observations = tuple(player._get_obs() for player in self.players)
+        done = game1.game_over or game2.game_over
+
+        # Extra reward for game won or lost
+        for i, game in enumerate((game1, game2)):
+            if game.won:
+                rewards[i] = 100
+            elif game.lost:
+                rewards[i] = -100
+
+        # Diagnostic information
+        info = {'success': success}
+        if battled:
+            info['battle'] = game1.battle_stats
+        if self.players[0].timer is not None:
+            info['timings'] = tuple(
+                player.timer.lap() for player in self.players)
+
+        return observations, rewards, done, info
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Resets both games in place and returns their initial observations.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the shop of player 1 is reseeded with it and the shop of
+            player 2 with `seed + 1`.
+        """
+        self._ready = [False, False]
+        return tuple(
+            player.reset(None if seed is None else seed + i)
+            for i, player in enumerate(self.players)
+        )
+
+    def render(self, mode='ansi'):
+        if mode == 'ansi':
+            for i, player in enumerate(self.players):
+                print(f'PLAYER {i + 1}')
+                player.render(mode)
+        else:
+            super().render(mode=mode)
+
+    def close(self):
+        for player in self.players:
+            player.close()
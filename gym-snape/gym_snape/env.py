@@ -1,8 +1,14 @@
 # Standard library imports
+from collections.abc import Mapping
 from pprint import pprint
+from typing import List, Optional
 
 # Local application imports
 from gym_snape.game import Game
+from gym_snape.game.curriculum import StartStateGenerator
+from gym_snape.game.ghosts import GhostPool, build_game
+from gym_snape.game.shop import PET_SLOTS, SHOP_SCHEDULE, ShopItem
+from gym_snape.game.timing import GAME_PHASES, PhaseTimer
 from gym_snape.game.pets import Pet
 from gym_snape.game.food import Food
 
@@ -11,19 +17,233 @@ import gym
 from gym import spaces
 import numpy as np
 
+# Layout of the flat observation (`obs_mode='flat'`): the scalar fields, then
+# the fields of each deck slot, then the fields of each shop slot. The fields
+# have the same meaning as in the dict observation (see `Snape`).
+SCALAR_FIELDS = ('n_turns', 'n_lives', 'n_trophies', 'n_gold', 'n_actions')
+DECK_FIELDS = ('type', 'id', 'health', 'health_buff', 'attack', 'attack_buff',
+               'effect_id', 'experience', 'level', 'gold_cost')
+SHOP_FIELDS = ('type', 'id', 'health', 'health_buff', 'attack', 'attack_buff',
+               'effect_id', 'gold_cost', 'is_frozen')
+N_DECK_SLOTS = 5  # see `Deck`
+N_SHOP_SLOTS = 7  # see `Shop`
+DECK_START = len(SCALAR_FIELDS)
+SHOP_START = DECK_START + N_DECK_SLOTS * len(DECK_FIELDS)
+FLAT_OBS_SIZE = SHOP_START + N_SHOP_SLOTS * len(SHOP_FIELDS)
+
+# Names of the fields of the flat observation, for error messages
+_FLAT_FIELD_NAMES = (
+    list(SCALAR_FIELDS)
+    + [f'deck[{i}].{k}' for i in range(N_DECK_SLOTS) for k in DECK_FIELDS]
+    + [f'shop[{i}].{k}' for i in range(N_SHOP_SLOTS) for k in SHOP_FIELDS]
+)
+
+# How much checking `Snape.step` does: none, on every Nth step, or on every
+# step (see `Snape`)
+VALIDATION_LEVELS = ('off', 'sampled', 'full')
+
+
+def split_flat_obs(obs: np.ndarray):
+    """
+    Splits flat observations into their scalar, deck, and shop parts.
+
+    Parameters
+    ----------
+    obs: np.ndarray
+        One flat observation, or a batch of them, of shape
+        (..., FLAT_OBS_SIZE).
+
+    Returns
+    ----------
+    Views of `obs` of shape (..., len(SCALAR_FIELDS)),
+    (..., N_DECK_SLOTS, len(DECK_FIELDS)), and
+    (..., N_SHOP_SLOTS, len(SHOP_FIELDS)).
+    """
+    batch_shape = obs.shape[:-1]
+    scalars = obs[..., :DECK_START]
+    deck = obs[..., DECK_START:SHOP_START].reshape(
+        batch_shape + (N_DECK_SLOTS, len(DECK_FIELDS)))
+    shop = obs[..., SHOP_START:].reshape(
+        batch_shape + (N_SHOP_SLOTS, len(SHOP_FIELDS)))
+    return scalars, deck, shop
+
+
+# Game attributes behind the scalar fields
+_SCALAR_ATTRS = dict(zip(SCALAR_FIELDS, ('turn', 'lives', 'trophies', 'gold',
+                                         'actions_taken')))
+_OBS_KEYS = SCALAR_FIELDS + ('deck', 'shop')
+
+
+class LazyView(Mapping):
+    """
+    The base class of lazy observations (`obs_mode='lazy'`): read-only
+    mappings over the live game that compute each field when it is read.
+
+    A view always reflects the current state of the game, not its state when
+    the view was returned; `materialize` takes a snapshot.
+    """
+    __slots__ = ('_env',)
+
+    def __init__(self, env):
+        self._env = env
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.materialize()!r})'
+
+    def __eq__(self, other):
+        # Compare snapshots rather than field by field through views
+        if isinstance(other, LazyView):
+            other = other.materialize()
+        return self.materialize() == other
+
+    def materialize(self):
+        """Returns the viewed fields as plain dicts, like the dict
+        observation (see `Snape`)."""
+        raise NotImplementedError
+
+
+class LazyObservation(LazyView):
+    """A lazy view of a whole observation."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key == 'deck':
+            return LazySlots(self._env, False)
+        elif key == 'shop':
+            return LazySlots(self._env, True)
+        return getattr(self._env.game, _SCALAR_ATTRS[key])
+
+    def __iter__(self):
+        return iter(_OBS_KEYS)
+
+    def __len__(self):
+        return len(_OBS_KEYS)
+
+    def materialize(self) -> dict:
+        return self._env._get_dict_obs()
+
+
+class LazySlots(LazyView):
+    """A lazy view of the deck or shop slots of an observation."""
+    __slots__ = ('_is_shop',)
+
+    def __init__(self, env, is_shop: bool):
+        super().__init__(env)
+        self._is_shop = is_shop
+
+    def __getitem__(self, index):
+        if type(index) != int or not 0 <= index < len(self):
+            raise KeyError(index)
+        return LazySlot(self._env, self._is_shop, index)
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        if self._is_shop:
+            return self._env._n_shop_slots
+        return self._env._n_deck_slots
+
+    def materialize(self) -> dict:
+        return self._env._get_dict_obs()['shop' if self._is_shop else 'deck']
+
+
+class LazySlot(LazyView):
+    """A lazy view of a single deck or shop slot of an observation."""
+    __slots__ = ('_is_shop', '_index')
+
+    def __init__(self, env, is_shop: bool, index: int):
+        super().__init__(env)
+        self._is_shop = is_shop
+        self._index = index
+
+    def __getitem__(self, field):
+        env = self._env
+        if self._is_shop:
+            if field not in SHOP_FIELDS:
+                raise KeyError(field)
+            slot = env.game.shop[self._index]
+            item = slot.item
+            if field == 'is_frozen':
+                return int(slot.is_frozen)
+            elif isinstance(item, Pet):
+                return env.IS_PET if field == 'type' else getattr(item, field)
+            elif isinstance(item, Food):
+                if field == 'type':
+                    return env.IS_FOOD
+                elif field in ('id', 'health', 'attack', 'gold_cost'):
+                    return getattr(item, field)
+                return 0
+            return env.IS_EMPTY if field == 'type' else 0
+        else:
+            if field not in DECK_FIELDS:
+                raise KeyError(field)
+            pet = env.game.deck[self._index]
+            if pet is None:
+                return env.IS_EMPTY if field == 'type' else 0
+            return env.IS_PET if field == 'type' else getattr(pet, field)
+
+    def __iter__(self):
+        return iter(SHOP_FIELDS if self._is_shop else DECK_FIELDS)
+
+    def __len__(self):
+        return len(SHOP_FIELDS if self._is_shop else DECK_FIELDS)
+
+    def materialize(self) -> dict:
+        game = self._env.game
+        if self._is_shop:
+            return self._env._encode_shop_slot(game.shop[self._index])
+        return self._env._encode_deck_slot(game.deck[self._index])
+
 
 class Snape(gym.Env):
     metadata = {'render.modes': ['ansi']}   
 
-    def __init__(self, display: bool = False):
+    def __init__(self, display: bool = False,
+                 ghost_pool: Optional[GhostPool] = None,
+                 timing: bool = False, obs_mode: str = 'dict',
+                 validation: str = 'off', validate_every: int = 100):
         super().__init__()
 
+        # Observations are either nested dicts, flat arrays, or lazy views of
+        # the game with the same keys as the nested dicts (see `LazyView`)
+        if obs_mode not in ('dict', 'flat', 'lazy'):
+            raise ValueError("obs_mode must be 'dict', 'flat', or 'lazy'")
+        self.obs_mode = obs_mode
+
+        # Actions and states are checked against their spaces on every step
+        # ('full'), on every `validate_every`-th step ('sampled'), or never
+        # ('off', the default), in which case the checks cost nothing
+        if validation not in VALIDATION_LEVELS:
+            raise ValueError(f'validation must be one of {VALIDATION_LEVELS}')
+        if type(validate_every) != int:
+            raise TypeError('validate_every must be an integer value')
+        if validate_every < 1:
+            raise ValueError('validate_every must be at least 1')
+        self.validation = validation
+        self.validate_every = validate_every
+        self._n_steps = 0
+
         # Create a game instance
         self.game = Game(display=display)
 
+        # Per-phase timing is only set up on request, so that it costs nothing
+        # otherwise; see `gym_snape.game.timing`
+        self.timer = None
+        if timing:
+            self.timer = PhaseTimer()
+            self.timer.instrument(self.game, GAME_PHASES)
+            self.timer.instrument(self, {'observation': ('_get_obs',)})
+
         # Initial opponent is no one
         self._opponent = None
 
+        # Pool of ghosts to record into and battle against, if any
+        self.ghost_pool = ghost_pool
+
+        # Generator of later start states, if any
+        self.curriculum = None
+
         """
         N = total number of shop slots (empty and non-empty)
         M = total number of deck slots (empty and non-empty)
@@ -149,14 +369,22 @@ class Snape(gym.Env):
             })) for i in range(self._n_deck_slots)
         ]))
 
+        # Food stats are not capped: the shop food multipliers (Cat) are
+        # applied again to frozen food on every roll, so they compound. The
+        # food slots come after the pet slots (see `Shop`)
+        n_pet_slots = int(SHOP_SCHEDULE[:, PET_SLOTS].max())
+        max_food_stat = INT_MAX - 1
+
         # Define the shop subspace
         self.shop_space = spaces.Dict(dict([
             (i, spaces.Dict({
                 'type': spaces.Discrete(3),
                 'id': spaces.Discrete(INT_MAX),
-                'health': spaces.Discrete(max_health+1),
+                'health': spaces.Discrete(
+                    (max_health if i < n_pet_slots else max_food_stat)+1),
                 'health_buff': spaces.Discrete(max_health+1),
-                'attack': spaces.Discrete(max_attack+1),
+                'attack': spaces.Discrete(
+                    (max_attack if i < n_pet_slots else max_food_stat)+1),
                 'attack_buff': spaces.Discrete(max_attack+1),
                 'effect_id': spaces.Discrete(INT_MAX),
                 'gold_cost': spaces.Discrete(max_gold_value+1),
@@ -169,35 +397,288 @@ class Snape(gym.Env):
         n_max_trophies = 10
         gold_per_turn = 10
 
+        # Gold is not capped: on top of the gold per turn, every pet of a full
+        # deck can give up to its level in gold at turn start (Swan), and sell
+        # for its level plus as much again (Pig)
+        max_gold = gold_per_turn + self._n_deck_slots * 2 * max_level
+
         # Define the entire obsevation space
-        self.observation_space = spaces.Dict({
+        self.dict_observation_space = spaces.Dict({
             'n_turns': spaces.Discrete(INT_MAX),
             'n_lives': spaces.Discrete(n_max_lives+1),
             'n_trophies': spaces.Discrete(n_max_trophies+1),
-            'n_gold': spaces.Discrete(gold_per_turn+1),
+            'n_gold': spaces.Discrete(max_gold+1),
             'n_actions': spaces.Discrete(INT_MAX),
             'deck': self.deck_space,
             'shop': self.shop_space
         })
 
+        # The flat observation space has the same bounds, field by field
+        subspaces = [self.dict_observation_space[k] for k in SCALAR_FIELDS]
+        for i in range(self._n_deck_slots):
+            subspaces.extend(self.deck_space[i][k] for k in DECK_FIELDS)
+        for i in range(self._n_shop_slots):
+            subspaces.extend(self.shop_space[i][k] for k in SHOP_FIELDS)
+        self.flat_observation_space = spaces.Box(
+            low=0, high=np.array([s.n - 1 for s in subspaces]),
+            dtype=np.int32
+        )
+
+        if self.obs_mode == 'flat':
+            self.observation_space = self.flat_observation_space
+        else:
+            self.observation_space = self.dict_observation_space
+
+        # Upper bounds of every field, for checking states without walking
+        # the nested dict space (see `_invalid_fields`). Every field has a
+        # lower bound of 0, so viewed as unsigned integers, negative values
+        # are above the upper bound as well
+        self._obs_high = self.flat_observation_space.high.view(np.uint32)
+
+        # Encodings of the slots from the last observation of each mode, with
+        # the keys of the slot contents they were made from (see
+        # `_changed_slots`), so that only changed slots are encoded again
+        n_slots = self._n_deck_slots + self._n_shop_slots
+        self._flat_obs = np.zeros(FLAT_OBS_SIZE, dtype=np.int32)
+        self._flat_keys = [None] * n_slots
+        self._dict_slots = [None] * n_slots
+        self._dict_keys = [None] * n_slots
+
         # Initial game state
         self.state = self._get_obs()
 
         # Check that the initial observation is valid
-        if not self.observation_space.contains(self.state):
+        if self.validation != 'off' and self._invalid_fields():
+            state = self.state
+            if isinstance(state, LazyView):
+                state = state.materialize()
             print('Invalid initial state')
-            pprint(self.state)
+            pprint(state)
 
     def assign_opponent(self, opponent):
         """Assign an opponent (environment object) to this environment."""
         self._opponent = opponent
 
+    def assign_ghost_pool(self, ghost_pool: GhostPool):
+        """
+        Assign a ghost pool to this environment.
+
+        Whenever the turn is ended, the pre-battle deck is recorded in the
+        pool. If no opponent has been assigned, the battle is fought against a
+        ghost sampled from the pool instead of a live environment. While the
+        pool holds no ghost of the current turn or an earlier one, the battle
+        is a mirror match against the game's own deck, rather than a free win
+        against an empty deck.
+        """
+        self.ghost_pool = ghost_pool
+
+    def assign_curriculum(self, curriculum: Optional[StartStateGenerator]):
+        """
+        Assign a start state generator to this environment.
+
+        Every reset then starts the game at a turn sampled by the generator,
+        rather than at turn 1. Assign None to start at turn 1 again.
+        """
+        self.curriculum = curriculum
+
+    def action_mask(self) -> np.ndarray:
+        """
+        Returns a boolean array over the action space that is True for every
+        legal action, i.e., one that would have its intended effect in the
+        current state.
+
+        Actions that are masked out (e.g., freezing an empty shop slot, buying
+        an item that cannot be afforded, merging pets of different types) are
+        no-ops or have unintended side effects, such as merging from an empty
+        deck slot. Ending the turn is always allowed.
+        """
+        mask = np.zeros(self.action_space.n, dtype=bool)
+        game = self.game
+        n_deck = self._n_deck_slots
+
+        mask[self.roll_action] = game.can_roll()
+        for i in range(self._n_shop_slots):
+            mask[self.freeze_actions.start + i] = game.can_freeze(i)
+            start = self.buy_actions.start + i * n_deck
+            for j in range(n_deck):
+                mask[start + j] = game.can_buy(i, j)
+        for i in range(n_deck):
+            mask[self.sell_actions.start + i] = game.can_sell(i)
+            for j in range(n_deck):
+                mask[self.swap_actions.start + i * n_deck + j] = \
+                    game.can_swap(i, j)
+                mask[self.merge_actions.start + i * n_deck + j] = \
+                    game.can_merge(i, j)
+        mask[self.end_turn_action] = True
+
+        return mask
+
     def step(self, action):
-        # Check that action is valid
-        assert self.action_space.contains(action), \
-            f'Action {action} is invalid; action space range is {self.action_space}'
+        self._n_steps += 1
+        validate = self.validation == 'full' or (
+            self.validation == 'sampled'
+            and self._n_steps % self.validate_every == 0
+        )
+
+        # Check that action is valid; plain integers are checked directly,
+        # anything else (e.g., NumPy integers) by the action space
+        if validate and not (
+                (type(action) == int and 0 <= action < self.action_space.n)
+                or self.action_space.contains(action)):
+            raise ValueError(f'Action {action} is invalid; action space '
+                             f'range is {self.action_space}')
+
+        success = self._apply_action(action)
+
+        if (not success and self._obs_turn == self.game.turn
+                and not self.game.game_over):
+            # The action was a no-op (see `Game.success`), and no battle has
+            # changed the game since the last observation, so only the number
+            # of actions taken needs updating
+            observation = self._get_unchanged_obs()
+            reward, done = -1, False
+        else:
+            # Get new observation and check for end-of-game
+            observation = self._get_obs()
+            done = self.game.game_over
 
-        # Process actions
+            # Small negative reward for each action taken
+            reward = -1
+
+            # Extra reward for game won or lost
+            if self.game.won:
+                reward = 100
+            elif self.game.lost:
+                reward = -100
+
+        # Check that the new state is valid
+        if validate:
+            invalid = self._invalid_fields()
+            if invalid:
+                raise RuntimeError(f'State is out of bounds after action '
+                                   f'{action}: {invalid}')
+
+        return observation, reward, done, self._step_info(action)
+
+    def _invalid_fields(self) -> List[str]:
+        """
+        Returns the names of the fields of the current state that are out of
+        the bounds of the observation space (see `FLAT_OBS_SIZE` for the
+        names), or an empty list if the state is valid.
+
+        The state is checked in its flat encoding, against precomputed arrays
+        of lower and upper bounds, whatever the observation mode.
+        """
+        if self.obs_mode != 'flat':
+            self._encode_flat_obs()
+        obs = self._flat_obs
+        invalid = obs.view(np.uint32) > self._obs_high
+        if not invalid.any():
+            return []
+        return [_FLAT_FIELD_NAMES[i] for i in np.flatnonzero(invalid)]
+
+    def _step_info(self, action: int) -> dict:
+        """Returns the diagnostic information of a step."""
+        info = {}
+        if action == self.end_turn_action:
+            info['battle'] = self.game.battle_stats
+        if self.timer is not None:
+            info['timings'] = self.timer.lap()
+        return info
+
+    def step_turn(self, plan):
+        """
+        Plays a whole turn in one call: applies the actions of the plan in
+        order, ends the turn, and returns the post-battle observation.
+
+        Parameters
+        ----------
+        plan: Iterable[int]
+            The actions to take this turn (roll, freeze, buy, sell, swap, or
+            merge), optionally followed by the end turn action. If the plan
+            does not end the turn, the end turn action is appended.
+
+        Returns
+        ----------
+        The observation after the battle, the sum of the rewards `step` would
+        have given for each action, the done flag, and a dict of diagnostic
+        information. `info['success']` is a boolean array with one flag per
+        action of the plan (including the appended end turn action) telling
+        whether the action had its intended effect. Actions that would have
+        been taken after the game ended are not applied and are flagged as
+        unsuccessful.
+
+        Example
+        ----------
+        >>> obs, reward, done, info = env.step_turn([buy, buy, swap])
+        >>> info['success']
+        array([ True, False,  True,  True])
+        """
+        plan = [int(action) for action in plan]
+        if not plan or plan[-1] != self.end_turn_action:
+            plan.append(self.end_turn_action)
+        for i, action in enumerate(plan):
+            if not self.action_space.contains(action):
+                raise ValueError(
+                    f'Action {action} is invalid; action space range is '
+                    f'{self.action_space}'
+                )
+            if action == self.end_turn_action and i != len(plan) - 1:
+                raise ValueError('the end turn action must end the plan')
+
+        success = np.zeros(len(plan), dtype=bool)
+        n_taken = 0
+        for action in plan:
+            if self.game.game_over:
+                break
+            success[n_taken] = self._apply_action(action)
+            n_taken += 1
+
+        # Get new observation and check for end-of-game
+        observation = self._get_obs()
+        done = self.game.game_over
+
+        # Small negative reward for each action taken, except that the last
+        # action taken gets the extra reward for the game being won or lost
+        reward = 0
+        if n_taken > 0:
+            reward = -n_taken
+            if self.game.won:
+                reward += 101
+            elif self.game.lost:
+                reward -= 99
+
+        # Diagnostic information
+        info = {'success': success, 'battle': self.game.battle_stats}
+        if self.timer is not None:
+            info['timings'] = self.timer.lap()
+
+        return observation, reward, done, info
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Resets the game in place and returns the initial observation.
+
+        If a curriculum has been assigned (see `assign_curriculum`), the game
+        starts at a turn sampled by it rather than at turn 1.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the shop's random number generator is reseeded with it.
+        """
+        if self.curriculum is None:
+            self.game.reset(seed)
+        else:
+            self.curriculum.fill(self.game, seed=seed)
+        if self.timer is not None:
+            # Start a fresh lap, so the next step reports only its own phases
+            self.timer.lap()
+        return self._get_obs()
+
+    def _apply_action(self, action: int) -> bool:
+        """Applies a single action to the game and returns whether it had its
+        intended effect (see `Game.success`)."""
         if action == self.roll_action:
             self.game.roll()
         elif action in self.freeze_actions:
@@ -220,117 +701,217 @@ class Snape(gym.Env):
             self.game.merge(indices)
         elif action == self.end_turn_action:
             if self._opponent:
+                if self.ghost_pool is not None:
+                    self.ghost_pool.add(self.game)
                 self.game.challenge(self._opponent.game)
+            elif self.ghost_pool is not None:
+                # Sample before recording this deck, so the game only battles
+                # its own ghost (a mirror match) if the pool has none for this
+                # turn or an earlier one
+                ghost = self.ghost_pool.sample(
+                    self.game.turn, self.game.trophies)
+                own_ghost = self.ghost_pool.add(self.game)
+                if ghost is None:
+                    ghost = own_ghost
+                self.game.challenge(build_game(ghost))
             else:
-                raise AttributeError('opponent has not yet been assigned')
-
-        # Get new observation and check for end-of-game
-        observation = self._get_obs()
-        done = self.game.game_over
-
-        # Small negative reward for each action taken
-        reward = -1
-
-        # Extra reward for game won or lost
-        if self.game.won:
-            reward = 100
-        elif self.game.lost:
-            reward = -100
-
-        # Diagnostic information
-        info = {}
-
-        return observation, reward, done, info
-
-    def reset(self):
-        self.game = Game()  # create a new game
-        return self._get_obs()
+                raise AttributeError(
+                    'neither an opponent nor a ghost pool has been assigned')
+        return self.game.success
 
     def _get_obs(self):
-        # Get deck state
-        deck_state = {}
+        # Battles are the only way the game changes other than by this
+        # environment's actions, and every battle starts a new turn
+        self._obs_turn = self.game.turn
+        if self.obs_mode == 'flat':
+            return self._get_flat_obs()
+        elif self.obs_mode == 'lazy':
+            return LazyObservation(self)
+        return self._get_dict_obs()
+
+    def _get_unchanged_obs(self):
+        """
+        Returns the observation from the encodings of the last one, when the
+        game has not changed since, except for the number of actions taken.
+        """
+        if self.obs_mode == 'flat':
+            obs = self._flat_obs
+            obs[SCALAR_FIELDS.index('n_actions')] = self.game.actions_taken
+            return obs.copy()
+        elif self.obs_mode == 'lazy':
+            return LazyObservation(self)
+        return self._assemble_dict_obs()
+
+    def _changed_slots(self, keys: list) -> List[int]:
+        """
+        Returns the indices of the slots (deck slots first, then shop slots)
+        whose contents changed since the given keys were last updated, and
+        updates the keys.
+
+        A slot has changed if it holds a different object than before (every
+        write to a deck or shop slot stores a new pet, food, or `ShopItem`),
+        or if the version of its pet or food changed (see `Pet.version`).
+        """
+        changed = []
         for i, pet in enumerate(self.game.deck):
-            if pet:
-                deck_state[i] = {
-                    'type': self.IS_PET,
-                    'id': pet.id,
-                    'health': pet.health,
-                    'health_buff': pet.health_buff,
-                    'attack': pet.attack,
-                    'attack_buff': pet.attack_buff,
-                    'effect_id': pet.effect_id,
-                    'experience': pet.experience,
-                    'level': pet.level,
-                    'gold_cost': pet.gold_cost,
-                }
+            version = pet._version if pet else 0
+            key = keys[i]
+            if key is None or key[0] is not pet or key[1] != version:
+                keys[i] = (pet, version)
+                changed.append(i)
+        for i, slot in enumerate(self.game.shop, self._n_deck_slots):
+            version = slot.item._version if slot.item else 0
+            key = keys[i]
+            if key is None or key[0] is not slot or key[1] != version:
+                keys[i] = (slot, version)
+                changed.append(i)
+        return changed
+
+    def _get_flat_obs(self) -> np.ndarray:
+        """Returns the observation as a flat array (see `FLAT_OBS_SIZE`)."""
+        self._encode_flat_obs()
+
+        # The returned array is the caller's to keep
+        return self._flat_obs.copy()
+
+    def _encode_flat_obs(self):
+        """Updates the last flat observation to the current state."""
+        obs = self._flat_obs
+        _, deck_state, shop_state = split_flat_obs(obs)
+
+        obs[:DECK_START] = (self.game.turn, self.game.lives,
+                            self.game.trophies, self.game.gold,
+                            self.game.actions_taken)
+
+        for i in self._changed_slots(self._flat_keys):
+            # Get deck state
+            if i < self._n_deck_slots:
+                pet = self.game.deck[i]
+                if pet:
+                    deck_state[i] = (self.IS_PET, pet.id, pet.health,
+                                     pet.health_buff, pet.attack,
+                                     pet.attack_buff, pet.effect_id,
+                                     pet.experience, pet.level, pet.gold_cost)
+                else:
+                    deck_state[i] = 0
+                continue
+
+            # Get shop state
+            i -= self._n_deck_slots
+            slot = self.game.shop[i]
+            item = slot.item
+            if isinstance(item, Pet):
+                shop_state[i] = (self.IS_PET, item.id, item.health,
+                                 item.health_buff, item.attack,
+                                 item.attack_buff, item.effect_id,
+                                 item.gold_cost, slot.is_frozen)
+            elif isinstance(item, Food):
+                shop_state[i] = (self.IS_FOOD, item.id, item.health, 0,
+                                 item.attack, 0, 0, item.gold_cost,
+                                 slot.is_frozen)
             else:
-                deck_state[i] = {
-                    'type': self.IS_EMPTY,
-                    'id': 0,
-                    'health': 0,
-                    'health_buff': 0,
-                    'attack': 0,
-                    'attack_buff': 0,
-                    'effect_id': 0,
-                    'experience': 0,
-                    'level': 0,
-                    'gold_cost': 0
-                }
-
-        # Get shop state
-        shop_state = {}
-        for i, slot in enumerate(self.game.shop):
-            if isinstance(slot.item, Pet):
-                pet = slot.item
-                shop_state[i] = {
-                    'type': self.IS_PET,
-                    'id': pet.id,
-                    'health': pet.health,
-                    'health_buff': pet.health_buff,
-                    'attack': pet.attack,
-                    'attack_buff': pet.attack_buff,
-                    'effect_id': pet.effect_id,
-                    'gold_cost': pet.gold_cost,
-                    'is_frozen': int(slot.is_frozen)
-                }
-            elif isinstance(slot.item, Food):
-                food = slot.item
-                shop_state[i] = {
-                    'type': self.IS_FOOD,
-                    'id': food.id,
-                    'health': food.health,
-                    'health_buff': 0,
-                    'attack': food.attack,
-                    'attack_buff': 0,
-                    'effect_id': 0,
-                    'gold_cost': food.gold_cost,
-                    'is_frozen': int(slot.is_frozen)
-                }
+                shop_state[i] = 0
+                shop_state[i, -1] = slot.is_frozen
+
+    def _get_dict_obs(self) -> dict:
+        # Encode the changed slots; the dicts of unchanged slots are shared
+        # with earlier observations, so they must never be modified
+        slots = self._dict_slots
+        for i in self._changed_slots(self._dict_keys):
+            if i < self._n_deck_slots:
+                slots[i] = self._encode_deck_slot(self.game.deck[i])
             else:
-                shop_state[i] = {
-                    'type': self.IS_EMPTY,
-                    'id': 0,
-                    'health': 0,
-                    'health_buff': 0,
-                    'attack': 0,
-                    'attack_buff': 0,
-                    'effect_id': 0,
-                    'gold_cost': 0,
-                    'is_frozen': int(slot.is_frozen)
-                }
-
-        # Return observation
+                slots[i] = self._encode_shop_slot(
+                    self.game.shop[i - self._n_deck_slots])
+        return self._assemble_dict_obs()
+
+    def _assemble_dict_obs(self) -> dict:
+        """Returns the dict observation made of the current scalar fields and
+        the last encodings of the slots."""
+        slots = self._dict_slots
+        n_deck = self._n_deck_slots
         observation = {
             'n_turns': self.game.turn,
             'n_lives': self.game.lives,
             'n_trophies': self.game.trophies,
             'n_gold': self.game.gold,
             'n_actions': self.game.actions_taken,
-            'deck': deck_state,
-            'shop': shop_state
+            'deck': dict((i, slots[i]) for i in range(n_deck)),
+            'shop': dict((i, slots[n_deck + i])
+                         for i in range(self._n_shop_slots))
         }
         return observation
 
+    def _encode_deck_slot(self, pet: Optional[Pet]) -> dict:
+        """Returns the dict observation of a deck slot."""
+        if pet:
+            return {
+                'type': self.IS_PET,
+                'id': pet.id,
+                'health': pet.health,
+                'health_buff': pet.health_buff,
+                'attack': pet.attack,
+                'attack_buff': pet.attack_buff,
+                'effect_id': pet.effect_id,
+                'experience': pet.experience,
+                'level': pet.level,
+                'gold_cost': pet.gold_cost,
+            }
+        else:
+            return {
+                'type': self.IS_EMPTY,
+                'id': 0,
+                'health': 0,
+                'health_buff': 0,
+                'attack': 0,
+                'attack_buff': 0,
+                'effect_id': 0,
+                'experience': 0,
+                'level': 0,
+                'gold_cost': 0
+            }
+
+    def _encode_shop_slot(self, slot: ShopItem) -> dict:
+        """Returns the dict observation of a shop slot."""
+        if isinstance(slot.item, Pet):
+            pet = slot.item
+            return {
+                'type': self.IS_PET,
+                'id': pet.id,
+                'health': pet.health,
+                'health_buff': pet.health_buff,
+                'attack': pet.attack,
+                'attack_buff': pet.attack_buff,
+                'effect_id': pet.effect_id,
+                'gold_cost': pet.gold_cost,
+                'is_frozen': int(slot.is_frozen)
+            }
+        elif isinstance(slot.item, Food):
+            food = slot.item
+            return {
+                'type': self.IS_FOOD,
+                'id': food.id,
+                'health': food.health,
+                'health_buff': 0,
+                'attack': food.attack,
+                'attack_buff': 0,
+                'effect_id': 0,
+                'gold_cost': food.gold_cost,
+                'is_frozen': int(slot.is_frozen)
+            }
+        else:
+            return {
+                'type': self.IS_EMPTY,
+                'id': 0,
+                'health': 0,
+                'health_buff': 0,
+                'attack': 0,
+                'attack_buff': 0,
+                'effect_id': 0,
+                'gold_cost': 0,
+                'is_frozen': int(slot.is_frozen)
+            }
+
     def render(self, mode='ansi'):
         if mode == 'ansi':
             print(str(self.game))
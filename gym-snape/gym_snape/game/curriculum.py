@@ -0,0 +1,195 @@
+"""
+Generates games that start at a later turn, for curricula that skip the early
+game.
+
+A generated game is in the state a game would be in at the start of the
+chosen turn: the deck holds pets that could have been bought by then, at
+levels and with stat gains that grow with the turn number; lives and trophies
+are the outcome of the battles fought so far; and the shop has been rolled at
+the tier and slot counts of the turn. The pets are created with their stats
+set directly, so no buy, summon, or level up abilities are triggered while
+building the deck; the turn start abilities of the deck are triggered, as at
+the start of any other turn.
+
+Example
+----------
+>>> generator = StartStateGenerator(turns=range(7, 12), seed=0)
+>>> game = generator.sample()           # a new game at a turn from 7 to 11
+>>> generator.fill(game, turn=9)        # or reuse a game
+>>> env.assign_curriculum(generator)    # or start every episode this way
+"""
+
+__all__ = ['StartStateGenerator']
+
+# Standard library imports
+from typing import Optional, Sequence
+
+# Local application imports
+from gym_snape.game.game import Game
+from gym_snape.game.pets import roll_rates
+from gym_snape.game.shop import LAST_SCHEDULED_TURN, SHOP_SCHEDULE, TIER
+from gym_snape.game.utils import MatchResult
+
+# Third party imports
+import numpy as np
+
+# The effects that food can give a pet, and the tier of that food
+_EFFECT_TIERS = {'Bee': 1, 'Bne': 2, 'Glc': 3, 'Spl': 5, 'Mln': 6, '1up': 6,
+                 'Stk': 6}
+
+# Chances of a battle being won, drawn, or lost
+_RESULT_PROBS = (0.45, 0.1, 0.45)
+
+
+class StartStateGenerator:
+    """
+    Builds games at the start of a chosen turn.
+
+    Parameters
+    ----------
+    turns: Sequence[int]
+        The turns to sample from, uniformly, when no turn is given. Default is
+        turns 1 through 11 (the turn at which tier 6 becomes available).
+
+    seed: int | None
+        Seed for the random number generator used to sample the decks, lives,
+        and trophies. The shops are rolled with the games' own generators.
+    """
+
+    def __init__(self, turns: Sequence[int] = range(1, 12),
+                 seed: Optional[int] = None):
+        turns = np.asarray(turns)
+        if turns.size == 0 or turns.min() < 1:
+            raise ValueError('turns must be a non-empty sequence of turns >= 1')
+        self.turns = turns
+        self.rng = np.random.default_rng(seed)
+
+        # Per tier: the pets and their roll probabilities (see `Shop`)
+        self._pets = dict(
+            (tier, [rr.item for rr in rates])
+            for tier, rates in roll_rates.items()
+        )
+        self._pet_probs = dict(
+            (tier, np.array([rr.rate for rr in rates]))
+            for tier, rates in roll_rates.items()
+        )
+
+    def _tier_at(self, turn: int) -> int:
+        """Returns the highest available shop tier at the given turn."""
+        return int(SHOP_SCHEDULE[min(turn, LAST_SCHEDULED_TURN), TIER])
+
+    def sample(self, turn: Optional[int] = None) -> Game:
+        """
+        Returns a new game at the start of the given turn.
+
+        Parameters
+        ----------
+        turn: int | None
+            The turn to start at. If None, a turn is sampled from `turns`.
+        """
+        game = Game()
+        self.fill(game, turn)
+        return game
+
+    def fill(self, game: Game, turn: Optional[int] = None,
+             seed: Optional[int] = None):
+        """
+        Resets the game in place to the start of the given turn.
+
+        Parameters
+        ----------
+        game: Game
+            The game to reset.
+
+        turn: int | None
+            The turn to start at. If None, a turn is sampled from `turns`.
+
+        seed: int | None
+            If given, the game's shop is reseeded with it (see `Game.reset`).
+        """
+        if turn is None:
+            turn = int(self.rng.choice(self.turns))
+        elif type(turn) != int:
+            raise TypeError('turn must be an integer value')
+        elif turn < 1:
+            raise ValueError('turn must be at least 1')
+
+        # The shop is rolled once the game is at the chosen turn
+        game.reset(seed, roll=turn == 1)
+        if turn == 1:
+            return
+
+        # Outcomes of the battles fought so far, stopping short of a game
+        # over; the battles that would have ended the game are draws instead
+        n_battles = turn - 1
+        won, drawn, lost = self.rng.multinomial(n_battles, _RESULT_PROBS)
+        won = min(won, game._TROPHIES_TO_WIN - 1)
+        lost = min(lost, game.lives - 1)
+        drawn = n_battles - won - lost
+        game._n_trophies = int(won)
+        game._n_lives -= int(lost)
+        results = ([MatchResult.WON] * won + [MatchResult.DRAW] * drawn +
+                   [MatchResult.LOST] * lost)
+        game._match_history.extend(
+            results[i] for i in self.rng.permutation(len(results)))
+
+        # About three pets are bought per turn
+        n_pets = min(len(game.deck), 3 * n_battles)
+        n_pets -= int(self.rng.random() < 0.2)
+
+        # Each pet was bought at a past turn, from that turn's tier
+        progress = min(1.0, n_battles / 10)
+        slots = self.rng.permutation(len(game.deck))[:n_pets]
+        for slot in slots:
+            tier = self._tier_at(int(self.rng.integers(1, turn)))
+            cls = self._pets[tier][self.rng.choice(
+                len(self._pets[tier]), p=self._pet_probs[tier])]
+            pet = cls()
+            self._grow(pet, progress)
+
+            # Food that gives an effect is available from its tier onwards
+            if self.rng.random() < 0.5 * progress:
+                effects = [e for e, t in _EFFECT_TIERS.items()
+                           if t <= self._tier_at(turn - 1)]
+                pet._effect = effects[self.rng.integers(len(effects))]
+
+            game.deck._pets[slot] = pet
+            pet.assign_game(game)
+            pet.assign_friends(game.deck)
+            pet.assign_shop(game.shop)
+
+        # Start the turn as after a battle
+        game._turn = turn - 1
+        game._n_actions_taken = 0
+        game._new_turn()
+
+    def _grow(self, pet, progress: float):
+        """
+        Levels the pet up and raises its stats as merges and food would have,
+        without triggering any abilities.
+        """
+        # Every merge adds one experience and +1/+1
+        max_experience = sum(pet._EXP_TO_LEVEL_UP)
+        experience = int(self.rng.binomial(max_experience, 0.6 * progress))
+        level, remaining = 1, experience
+        for exp_needed in pet._EXP_TO_LEVEL_UP:
+            if remaining < exp_needed:
+                break
+            remaining -= exp_needed
+            level += 1
+        pet._level = level
+        # At max level, experience is also maxed out
+        if level == pet._MAX_LEVEL:
+            remaining = pet._EXP_TO_LEVEL_UP[-1]
+        pet._experience = remaining
+
+        # Every food eaten adds +1 to attack or health
+        n_food = int(self.rng.poisson(6 * progress))
+        attack_gain = int(self.rng.binomial(n_food, 0.5))
+        pet._attack = min(pet.attack + experience + attack_gain,
+                          pet._MAX_ATTACK)
+        pet._health = min(pet.health + experience + n_food - attack_gain,
+                          pet._MAX_HEALTH)
+
+        # Bought pets sell for 1 gold, plus 1 per level up
+        pet._gold_cost = level
@@ -5,6 +5,7 @@ from typing import Final, Literal, Optional
 # Local application imports
 from gym_snape.game.food import Food
 from gym_snape.game.pets import Pet
+from gym_snape.game.utils import WeakAttribute
 
 
 class Deck:
@@ -12,6 +13,9 @@ class Deck:
     The deck used in the game.
     """
 
+    # Back-reference to the game that owns this deck
+    _game = WeakAttribute()
+
     def __init__(self):
         self.N_DECK_SLOTS: Final = 5
         self._pets = [None] * self.N_DECK_SLOTS
@@ -101,11 +105,24 @@ class Deck:
     def success(self):
         return self._last_op_success
 
+    def clear(self):
+        """Empties all slots."""
+        for i in range(self.N_DECK_SLOTS):
+            self._pets[i] = None
+        self._last_op_success = True
+
     def is_empty(self):
         """Returns True if all slots are empty, False otherwise."""
         count = sum([1 for p in self if p])
         return count == 0
 
+    def battle_state(self) -> tuple:
+        """
+        Returns a hashable snapshot of the pets' battle-relevant state, per
+        slot (see `Pet.battle_key`).
+        """
+        return tuple(p.battle_key() if p else None for p in self._pets)
+
     def index(self, pet: Pet):
         """Returns the index of the given pet, -1 if not found."""
         self._last_op_success = False
@@ -172,12 +189,11 @@ class Deck:
 
         Notes
         ----------
-        We cannot simply use Python's copy.deepcopy on an instance of the deck
-        to prepare it for battle because copy.deepcopy will assign to each deck
-        pet a new instance of Game to its _game variable. Therefore, when deck
-        deck pets hand up their ability casts to the battle manager, they will 
-        be giving it to the copy of the Game rather than the original Game 
-        instance which is actually running the battle. 
+        Pets only hold weak references to their game, decks, and shop (see
+        `gym_snape.game.utils.WeakAttribute`), which copy.deepcopy shares
+        rather than copies. Copying the pets therefore copies nothing but the
+        pets themselves, and the copies still hand up their ability casts to
+        the original Game instance which is actually running the battle.
 
         Raises
         ----------
@@ -0,0 +1,177 @@
+"""
+Routes the random draws of the game, so they can be recorded and replayed.
+
+Every random draw made by the shop or by pet and food abilities goes through
+`choice` or `integers`. Normally, these draw from the given generator (the
+shop's) or from NumPy's global generator (abilities'). While a `RandomTape`
+is recording, every draw is also appended to the tape; while a tape is being
+replayed, draws are read back from the tape instead, and no generator is
+touched. A replayed run takes the same code path as the recorded one, with
+the same outcomes, whatever the state of the generators.
+
+Example
+----------
+>>> tape = RandomTape()
+>>> with tape.recording():
+...     game.challenge(opponent)
+>>> np.save('battle.npy', tape.data)
+>>> with RandomTape(np.load('battle.npy')).replaying():
+...     same_game.challenge(same_opponent)  # same targets, same shop
+"""
+
+__all__ = ['RandomTape', 'choice', 'integers']
+
+# Standard library imports
+from contextlib import contextmanager
+from typing import List, Optional
+
+# Third party imports
+import numpy as np
+
+# The tape that draws are recorded to or replayed from, if any
+_tape: Optional['RandomTape'] = None
+
+
+class RandomTape:
+    """
+    A recording of random draws, as a flat array of integers.
+
+    Parameters
+    ----------
+    data: array_like | None
+        The draws of an earlier recording (see `data`), to replay. If None
+        (default), the tape is empty and can be recorded to.
+    """
+
+    def __init__(self, data: Optional[np.ndarray] = None):
+        self._recorded: List[int] = []
+        self._data = None if data is None else np.asarray(data, dtype=np.int64)
+        self._position = 0
+        self._replaying = False
+
+    def __len__(self) -> int:
+        """Returns the number of draws on the tape."""
+        if self._data is None:
+            return len(self._recorded)
+        return len(self._data) + len(self._recorded)
+
+    @property
+    def data(self) -> np.ndarray:
+        """The draws on the tape, in order, as an int64 array."""
+        recorded = np.array(self._recorded, dtype=np.int64)
+        if self._data is None:
+            return recorded
+        return np.concatenate([self._data, recorded])
+
+    @property
+    def remaining(self) -> int:
+        """The number of draws left to replay."""
+        return len(self.data) - self._position
+
+    @contextmanager
+    def recording(self):
+        """Within this context, every draw is appended to the tape."""
+        with self._activate(replaying=False):
+            yield self
+
+    @contextmanager
+    def replaying(self):
+        """
+        Within this context, draws are read from the tape, starting where the
+        last replay left off (see `rewind`).
+        """
+        if self._recorded:
+            self._data = self.data
+            self._recorded = []
+        if self._data is None:
+            self._data = np.zeros(0, dtype=np.int64)
+        with self._activate(replaying=True):
+            yield self
+
+    def rewind(self):
+        """Makes the next replay start from the first draw again."""
+        self._position = 0
+
+    @contextmanager
+    def _activate(self, replaying: bool):
+        global _tape
+        previous, _tape = _tape, self
+        self._replaying = replaying
+        try:
+            yield
+        finally:
+            _tape = previous
+
+    def _record(self, result):
+        if np.ndim(result) == 0:
+            self._recorded.append(int(result))
+        else:
+            self._recorded.extend(np.ravel(result).tolist())
+
+    def _replay(self, high: int, size):
+        """Returns the next draw(s) from the tape, of the given size."""
+        start = self._position
+        n = 1 if size is None else int(np.prod(size))
+        if start + n > len(self._data):
+            raise ValueError('the random tape has run out of draws')
+        values = self._data[start:start + n]
+        if values.size and (values.min() < 0 or values.max() >= high):
+            raise ValueError(
+                'the random tape does not match the draws being made')
+        self._position = start + n
+        if size is None:
+            return int(values[0])
+        return values.reshape(size)
+
+
+def choice(n: int, size=None, replace: bool = True, p=None,
+           rng: Optional[np.random.Generator] = None):
+    """
+    Draws indices into a population of `n` items, as `Generator.choice`
+    would draw items from it.
+
+    Parameters
+    ----------
+    n: int
+        The size of the population.
+
+    size: int | Tuple[int, ...] | None
+        The shape of the draw. If None (default), a single index is drawn.
+
+    replace: bool
+        Whether indices can be drawn more than once.
+
+    p: array_like | None
+        The probability of each index. If None, indices are equally likely.
+
+    rng: np.random.Generator | None
+        The generator to draw from. If None (default), NumPy's global
+        generator is drawn from.
+    """
+    tape = _tape
+    if tape is not None and tape._replaying:
+        return tape._replay(n, size)
+    source = np.random if rng is None else rng
+    result = source.choice(n, size, replace, p)
+    if tape is not None:
+        tape._record(result)
+    return result
+
+
+def integers(high: int, size=None,
+             rng: Optional[np.random.Generator] = None):
+    """
+    Draws integers from 0 (inclusive) to `high` (exclusive).
+
+    See `choice` for the meaning of `size` and `rng`.
+    """
+    tape = _tape
+    if tape is not None and tape._replaying:
+        return tape._replay(high, size)
+    if rng is None:
+        result = np.random.randint(high, size=size)
+    else:
+        result = rng.integers(high, size=size)
+    if tape is not None:
+        tape._record(result)
+    return result
@@ -2,6 +2,9 @@
 from abc import ABC, abstractmethod
 import typing
 
+# Local application imports
+from gym_snape.game.utils import WeakAttribute
+
 
 class Food(ABC):
     """
@@ -12,7 +15,14 @@ class Food(ABC):
     characters must be unique among all foods.
     """
 
+    # Back-references to the deck and shop this food is used with
+    _deck = WeakAttribute()
+    _shop = WeakAttribute()
+
     def __init__(self):
+        # Incremented whenever a stat shown in observations changes
+        self._version = 0
+
         self._name = ''
         self._last_op_success = True
         self._gold_cost = 3
@@ -37,6 +47,14 @@ class Food(ABC):
         """
         return int(''.join([str(ord(ch)) for ch in self._name[:3]]))
 
+    @property
+    def version(self) -> int:
+        """
+        A counter that changes whenever the food's stats change, so that
+        observations can tell whether the food needs to be encoded again.
+        """
+        return self._version
+
     @property
     def success(self):
         return self._last_op_success
@@ -50,6 +68,7 @@ class Food(ABC):
         if type(value) != int:
             raise TypeError('gold cost must be integer value')
         self._gold_cost = max(0, value)
+        self._version += 1
 
     @property
     def health(self):
@@ -61,6 +80,7 @@ class Food(ABC):
             raise TypeError('health must be integer value')
         else:
             self._health = value
+            self._version += 1
 
     @property
     def attack(self):
@@ -72,6 +92,16 @@ class Food(ABC):
             raise TypeError('attack must be integer value')
         else:
             self._attack = value
+            self._version += 1
+
+    def can_use(self, deck, index: int) -> bool:
+        """
+        Returns True if using this food on the given deck slot would succeed.
+
+        By default, food is used on a single pet, so the slot must hold one.
+        Foods that affect other pets or the shop override this.
+        """
+        return deck[index] is not None
 
     @abstractmethod
     def on_use(self, *args, **kwargs):
@@ -5,11 +5,9 @@ Definitions of the tier 3 food items: Garlic and Salad Bowl.
 __all__ = ['Garlic', 'SaladBowl']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.food import Food
 
-# Third party imports
-import numpy as np
-
 
 class Garlic(Food):
     def __init__(self):
@@ -32,12 +30,17 @@ class SaladBowl(Food):
         self.attack = 1
         self.health = 1
 
+    def can_use(self, deck, index: int) -> bool:
+        """Any deck slot can be chosen, as long as the deck has a pet."""
+        return not deck.is_empty()
+
     def on_use(self, *args, **kwargs):
         """Give 2 random animals +1/+1."""
         choices = [pet for pet in self._deck if pet]
         n_chosen = min(len(choices), 2)
         if n_chosen >= 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.attack += self.attack
                 c.health += self.health
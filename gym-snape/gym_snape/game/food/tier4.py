@@ -15,6 +15,10 @@ class CannedFood(Food):
         self.attack = 2
         self.health = 2
 
+    def can_use(self, deck, index: int) -> bool:
+        """Canned food goes to the shop, so it can always be used."""
+        return True
+
     def on_use(self, *args, **kwargs):
         """Give all current and future shop pets +2/+2."""
         self._shop.pet_attack_bonus += self.attack
@@ -5,11 +5,9 @@ Definitions of the tier 5 food items: Chili, Chocolate, and Sushi.
 __all__ = ['Chili', 'Chocolate', 'Sushi']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.food import Food
 
-# Third party imports
-import numpy as np
-
 
 class Chili(Food):
     def __init__(self):
@@ -30,6 +28,11 @@ class Chocolate(Food):
         super().__init__()
         self._name = 'CHOCOLATE'
 
+    def can_use(self, deck, index: int) -> bool:
+        """The slot must hold a pet that can still gain experience, i.e., one
+        below the max level."""
+        return deck[index] is not None and deck[index].can_level()
+
     def on_use(self, index):
         """Give a deck pet +1 experience."""
         if self._deck[index]:
@@ -57,12 +60,17 @@ class Sushi(Food):
         self.attack = 1
         self.health = 1
 
+    def can_use(self, deck, index: int) -> bool:
+        """Any deck slot can be chosen, as long as the deck has a pet."""
+        return not deck.is_empty()
+
     def on_use(self, *args, **kwargs):
         """Give 3 random animals +1/+1."""
         choices = [pet for pet in self._deck if pet]
         n_chosen = min(len(choices), 3)
         if n_chosen >= 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.attack += self.attack
                 c.health += self.health
@@ -5,11 +5,9 @@ Definitions of the tier 6 food items: Melon, Mushroom, Pizza, and Steak.
 __all__ = ['Melon', 'Mushroom', 'Pizza', 'Steak']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.food import Food
 
-# Third party imports
-import numpy as np
-
 
 class Melon(Food):
     def __init__(self):
@@ -46,12 +44,17 @@ class Pizza(Food):
         self.attack = 2
         self.health = 2
 
+    def can_use(self, deck, index: int) -> bool:
+        """Any deck slot can be chosen, as long as the deck has a pet."""
+        return not deck.is_empty()
+
     def on_use(self, *args, **kwargs):
         """Give 2 random animals +2/+2."""
         choices = [pet for pet in self._deck if pet]
         n_chosen = min(len(choices), 2)
         if n_chosen >= 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.attack += self.attack
                 c.health += self.health
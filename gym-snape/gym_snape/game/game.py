@@ -1,13 +1,20 @@
 # Standard library imports
 from functools import wraps
 from collections.abc import Callable
+import pickle
+import struct
 from typing import Any, Final, List, Optional, ParamSpec, Tuple, TypeVar
 
 # Local application imports
+from gym_snape.game import profiling
 from gym_snape.game.utils import MatchResult
 from gym_snape.game.deck import Deck
 from gym_snape.game.pets import Pet
 from gym_snape.game.shop import Shop, ShopItem
+from gym_snape.game.food import Food
+from gym_snape.game.registry import (decode_pet, encode_pet, food_code,
+                                     make_food)
+from gym_snape.game.timing import untimed_state
 
 # Typing definitions
 P = ParamSpec('P')
@@ -15,6 +22,19 @@ T = TypeVar('T')
 SrcDstPair = Tuple[int, int]
 AbilityCastEntry = Tuple[Pet, Callable[P, T], Any, Any]
 
+# Fixed layout of the binary encoding produced by `Game.to_bytes`. The header
+# holds the format version, turn, lives, trophies, gold, actions taken, shop
+# pet bonuses, shop food multipliers, and the result of the last match. Each
+# pet is stored as class code, attack, health, attack buff, health buff, level,
+# experience, effect code, and gold cost (see `gym_snape.game.registry`). Each
+# shop slot is prefixed by its item type and freeze flag.
+_STATE_VERSION = 1
+_STATE_HEADER = struct.Struct('<BHBBBIhhBBB')
+_PET_STATE = struct.Struct('<BhhhhBBBB')
+_SHOP_SLOT_STATE = struct.Struct('<BB' + _PET_STATE.format[1:])
+_NO_MATCH = 0xFF
+_SHOP_EMPTY, _SHOP_PET, _SHOP_FOOD = 0, 1, 2
+
 
 def display_game(bound_method: Callable[P, T]) -> Callable[P, T]:
     """A decorator for `Game`'s methods that prints the state of the game after
@@ -37,6 +57,7 @@ def check_game_over(bound_method: Callable[P, T]) -> Callable[P, T]:
             result = bound_method(self, *args, **kwargs)
             return result
         else:
+            self._last_op_success = False
             print('This game has ended. No further actions can be taken.')
     return _impl
 
@@ -55,9 +76,21 @@ class Game:
 
     debug: bool
         If True, print the state of the game at various points during battle.
+
+    max_battle_rounds: int
+        The number of rounds after which a battle that has not been decided
+        is called a draw. Default is 200.
     """
 
-    def __init__(self, display: bool = False, debug: bool = False):
+    def __init__(self, display: bool = False, debug: bool = False,
+                 max_battle_rounds: int = 200):
+        self._setup(display, debug, max_battle_rounds)
+        self.roll(is_turn_start=True)
+
+    def _setup(self, display: bool = False, debug: bool = False,
+               max_battle_rounds: int = 200):
+        """Creates the deck and the shop, and sets the turn 1 state, without
+        rolling the shop."""
         self.deck = Deck()
         self.deck.assign_game(self)
         self.shop = Shop()
@@ -72,10 +105,11 @@ class Game:
 
         self.display = display
         self.debug = debug
+        self.max_battle_rounds = max_battle_rounds
         self._n_actions_taken = 0
+        self._last_op_success = True
         self._match_history = []
-        self.roll(is_turn_start=True)
-
+        self._reset_battle_stats()
         self._abilities_to_cast = []
 
     def __str__(self):
@@ -145,6 +179,167 @@ class Game:
         """Prints self when called."""
         print(self)
 
+    def reset(self, seed: Optional[int] = None, roll: bool = True):
+        """
+        Resets the game to its turn 1 state in place.
+
+        The existing deck and shop are emptied and reused rather than replaced,
+        and the shop is rolled as at the start of a new game.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the shop's random number generator is reseeded with it.
+            Otherwise, the generator continues from its current state.
+
+        roll: bool
+            If False, the shop is left empty, for callers that start the game
+            at a later turn and roll the shop then (see
+            `gym_snape.game.curriculum`).
+        """
+        self.deck.clear()
+        self.shop.reset(seed)
+
+        self._turn = 1
+        self._n_lives = 10
+        self._n_trophies = 0
+        self._n_gold = self._GOLD_PER_TURN
+        self._n_actions_taken = 0
+        self._match_history.clear()
+        self._abilities_to_cast.clear()
+        self._reset_battle_stats()
+        if roll:
+            self.roll(is_turn_start=True)
+
+    def _reset_battle_stats(self):
+        """Zeroes the counters reported by `battle_stats`."""
+        self._n_battle_rounds = 0
+        self._n_stalemates = 0
+        self._n_round_caps = 0
+
+    def __getstate__(self) -> dict:
+        """
+        Returns the state to pickle the game with, leaving out the timing
+        wrappers of `PhaseTimer.instrument`, so that timed games can be
+        pickled and copied; the copies are not timed.
+        """
+        return untimed_state(self)
+
+    def __deepcopy__(self, memo):
+        """
+        Copies the game through pickle. `copy.deepcopy` would share the
+        back-references of the pets, food, and deck (see
+        `gym_snape.game.utils.WeakAttribute`), which must point to the copy.
+        """
+        return pickle.loads(pickle.dumps(self, pickle.HIGHEST_PROTOCOL))
+
+    def to_bytes(self) -> bytes:
+        """
+        Encodes the state of the game into a small, fixed-size buffer.
+
+        The encoding covers the turn, lives, trophies, gold, number of actions
+        taken, the deck slots, the shop slots with their freeze flags, and the
+        shop bonuses. Of the match history, only the last result is kept. The
+        state of the shop's random number generator is not kept.
+
+        See also
+        ----------
+        - `from_bytes`
+        """
+        shop = self.shop
+        last_match = (self._match_history[-1] if self._match_history
+                      else _NO_MATCH)
+        chunks = [_STATE_HEADER.pack(
+            _STATE_VERSION, self._turn, self._n_lives, self._n_trophies,
+            self._n_gold, self._n_actions_taken, shop.pet_attack_bonus,
+            shop.pet_health_bonus, shop.food_attack_multiplier,
+            shop.food_health_multiplier, last_match
+        )]
+        for pet in self.deck:
+            chunks.append(_PET_STATE.pack(*encode_pet(pet)))
+        for item, is_frozen in shop:
+            if isinstance(item, Pet):
+                chunks.append(_SHOP_SLOT_STATE.pack(
+                    _SHOP_PET, is_frozen, *encode_pet(item)))
+            elif isinstance(item, Food):
+                chunks.append(_SHOP_SLOT_STATE.pack(
+                    _SHOP_FOOD, is_frozen, food_code(item), item.attack,
+                    item.health, 0, 0, 0, 0, 0, item.gold_cost))
+            else:
+                chunks.append(_SHOP_SLOT_STATE.pack(
+                    _SHOP_EMPTY, is_frozen, *encode_pet(None)))
+        return b''.join(chunks)
+
+    @classmethod
+    def from_bytes(cls, data: bytes):
+        """
+        Creates a game from a buffer returned by `to_bytes`.
+
+        The shop is not rolled, so no random draws are made. Its random number
+        generator is unseeded, and can be replaced through `shop.rng`.
+
+        Raises
+        ----------
+        ValueError if the buffer was written by an unsupported version.
+        """
+        if data[0] != _STATE_VERSION:
+            raise ValueError(f'unsupported game state version {data[0]}')
+
+        (_, turn, lives, trophies, gold, actions, pet_attack_bonus,
+         pet_health_bonus, food_attack_multiplier, food_health_multiplier,
+         last_match) = _STATE_HEADER.unpack_from(data, 0)
+
+        game = cls.__new__(cls)
+        game._setup()
+        game._turn = turn
+        game._n_lives = lives
+        game._n_trophies = trophies
+        game._n_gold = gold
+        game._n_actions_taken = actions
+        if last_match != _NO_MATCH:
+            game._match_history.append(MatchResult(last_match))
+
+        shop = game.shop
+        shop.turn = turn
+        shop.pet_attack_bonus = pet_attack_bonus
+        shop.pet_health_bonus = pet_health_bonus
+        shop.food_attack_multiplier = food_attack_multiplier
+        shop.food_health_multiplier = food_health_multiplier
+
+        offset = _STATE_HEADER.size
+        for i in range(len(game.deck)):
+            pet = decode_pet(*_PET_STATE.unpack_from(data, offset))
+            offset += _PET_STATE.size
+            game.deck._pets[i] = pet
+            if pet:
+                pet.assign_game(game)
+                pet.assign_friends(game.deck)
+                pet.assign_shop(shop)
+
+        for i in range(len(shop)):
+            kind, is_frozen, *fields = _SHOP_SLOT_STATE.unpack_from(
+                data, offset)
+            offset += _SHOP_SLOT_STATE.size
+            if kind == _SHOP_PET:
+                item = decode_pet(*fields)
+                item.assign_game(game)
+                item.assign_shop(shop)
+            elif kind == _SHOP_FOOD:
+                item = make_food(fields[0])
+                item._attack, item._health = fields[1], fields[2]
+                item._gold_cost = fields[-1]
+                item._version += 1
+                item.assign_shop(shop)
+            else:
+                item = None
+            if i < len(shop._pet_slots):
+                shop._pet_slots[i] = ShopItem(item, bool(is_frozen))
+            else:
+                shop._food_slots[i - len(shop._pet_slots)] = ShopItem(
+                    item, bool(is_frozen))
+
+        return game
+
     @property
     def turn(self) -> int:
         return self._turn
@@ -222,6 +417,65 @@ class Game:
     def match_history(self) -> List[MatchResult]:
         return self._match_history
 
+    @property
+    def success(self) -> bool:
+        """
+        True if the last action (roll, freeze, buy, sell, swap, merge, or
+        challenge) had its intended effect, False if it was a no-op.
+
+        An action that was a no-op changed nothing about the game but the
+        number of actions taken.
+        """
+        return self._last_op_success
+
+    @property
+    def battle_stats(self) -> dict:
+        """
+        Diagnostics of the battles this game took part in: the number of rounds
+        fought in the last battle, and the number of battles called a draw
+        because of a stalemate or because the round cap was reached.
+        """
+        return {
+            'rounds': self._n_battle_rounds,
+            'stalemates': self._n_stalemates,
+            'round_caps': self._n_round_caps,
+        }
+
+    def can_roll(self) -> bool:
+        """True if `roll` would reroll the shop."""
+        return not self.game_over and self._n_gold >= self._ROLL_COST
+
+    def can_freeze(self, index: int) -> bool:
+        """True if `freeze` would (un)freeze the given shop slot."""
+        return not self.game_over and bool(self.shop[index].item)
+
+    def can_buy(self, shop_index: int, deck_index: int) -> bool:
+        """True if `buy` would buy the given shop item into the deck slot."""
+        item = self.shop[shop_index].item
+        if self.game_over or not item or self._n_gold < item.gold_cost:
+            return False
+        if isinstance(item, Food):
+            return item.can_use(self.deck, deck_index)
+        pet = self.deck[deck_index]
+        return pet is None or (type(pet) == type(item) and pet.can_level())
+
+    def can_sell(self, index: int) -> bool:
+        """True if `sell` would sell the pet in the given deck slot."""
+        return not self.game_over and self.deck[index] is not None
+
+    def can_swap(self, src: int, dst: int) -> bool:
+        """True if `swap` would change the deck."""
+        return (not self.game_over and src != dst and
+                (self.deck[src] is not None or self.deck[dst] is not None))
+
+    def can_merge(self, src: int, dst: int) -> bool:
+        """True if `merge` would merge the source pet into the destination."""
+        if self.game_over or src == dst:
+            return False
+        src_pet, dst_pet = self.deck[src], self.deck[dst]
+        return (src_pet is not None and dst_pet is not None and
+                type(src_pet) == type(dst_pet) and dst_pet.can_level())
+
     # @check_game_over
     def add_ability_to_cast(self, value: AbilityCastEntry):
         """
@@ -261,7 +515,11 @@ class Game:
         self._abilities_to_cast.extend(other_game_instance._abilities_to_cast)
         other_game_instance._abilities_to_cast = []
 
+        profiler = profiling.profiler
+        depth = 0
         while len(self._abilities_to_cast) > 0:
+            depth += 1
+
             # Sort abilities by requester's attack power
             self._abilities_to_cast.sort(key=lambda x: x[0], reverse=True)
 
@@ -270,13 +528,19 @@ class Game:
             for _ in range(L):
                 a2c = self._abilities_to_cast.pop(0)
                 pet, ability, args, kwargs = a2c
-                ability(pet, *args, **kwargs)
+                if profiler is None:
+                    ability(pet, *args, **kwargs)
+                else:
+                    profiler.call(pet, ability, args, kwargs)
 
             # Check for more abilities that were triggered by the previous set
             self._abilities_to_cast.extend(
                 other_game_instance._abilities_to_cast)
             other_game_instance._abilities_to_cast = []
 
+        if profiler is not None:
+            profiler.cascade(depth)
+
     @check_game_over
     @display_game
     def roll(self, is_turn_start: bool = False):
@@ -353,14 +617,32 @@ class Game:
         |lvl: 1    ||lvl: 1    ||lvl: 1    ||          ||          ||          ||          |
         0----------01----------12----------23----------34----------45----------56----------6
         """
+        if self._pay_for_roll(is_turn_start):
+            self.shop.roll()
+        self._claim_shop_pets()
+
+    def _pay_for_roll(self, is_turn_start: bool = False) -> bool:
+        """
+        Counts a roll as an action and charges its cost, and returns whether
+        the shop should be rolled.
+
+        Together with `_claim_shop_pets`, this is `roll` without the rolling
+        itself, so that many shops can be rolled at once (see
+        `gym_snape.game.shop.roll_shops`).
+        """
         self._n_actions_taken += 1
 
+        self._last_op_success = True
         if not is_turn_start and self.gold >= self._ROLL_COST:
             self.gold -= self._ROLL_COST
-            self.shop.roll()
+            return True
         elif is_turn_start:
-            self.shop.roll()
+            return True
+        self._last_op_success = False
+        return False
 
+    def _claim_shop_pets(self):
+        """Assigns this game to the pets in the shop."""
         for i in range(len(self.shop)):
             if isinstance(self.shop[i].item, Pet):
                 self.shop[i].item.assign_game(self)
@@ -447,6 +729,7 @@ class Game:
 
         item = self.shop[index].item
         is_frozen = self.shop[index].is_frozen
+        self._last_op_success = bool(item)
         if item:
             self.shop[index] = ShopItem(item, not is_frozen)
 
@@ -561,8 +844,10 @@ class Game:
             )
 
         item = self.shop[shop_index].item
+        self._last_op_success = False
         if item and self._n_gold >= item.gold_cost:
             self.deck[deck_index] = self.shop[shop_index].item
+            self._last_op_success = self.deck.success
             if self.deck.success:  # check if insertion was successful
                 self._n_gold -= self.shop[shop_index].item.gold_cost
                 del self.shop[shop_index]
@@ -650,6 +935,7 @@ class Game:
 
         # Sell the specified pet
         pet = self.deck[index]
+        self._last_op_success = pet is not None
         if pet:
             self._n_gold += pet.gold_cost
             pet.on_sell()
@@ -763,7 +1049,11 @@ class Game:
                 ' just a as a SrcDstPair'
             )
 
-        self.deck.swap(src, dst)
+        # Swapping a slot with itself would trigger summon abilities again,
+        # so such swaps (and swaps of two empty slots) are no-ops
+        self._last_op_success = self.can_swap(src, dst)
+        if self._last_op_success:
+            self.deck.swap(src, dst)
 
     @check_game_over
     @display_game
@@ -871,30 +1161,51 @@ class Game:
                 ' just a as a SrcDstPair'
             )
 
-        self.deck.merge(src, dst)
+        # Merging from an empty slot would clear the destination slot, so
+        # anything but combining two pets is a no-op
+        self._last_op_success = self.can_merge(src, dst)
+        if self._last_op_success:
+            self.deck.merge(src, dst)
 
     @check_game_over
-    def _new_turn(self):
+    def _new_turn(self, roll: bool = True):
         """
         Resets the player's gold, rolls the shop, and increments turn.
 
-        Called at the end of each battle.
+        Called at the end of each battle, unless the game is over. If `roll`
+        is False, the roll is paid for, but the shop is not rolled and turn
+        start abilities are not called; the caller rolls the shop (e.g., with
+        `gym_snape.game.shop.roll_shops`), then calls `_claim_shop_pets` and
+        `_turn_start`.
         """
+        if self.game_over:
+            return
+        self._begin_turn()
+        if roll:
+            self.roll(is_turn_start=True)
+            self._turn_start()
+        else:
+            self._pay_for_roll(is_turn_start=True)
+
+    def _begin_turn(self):
+        """Resets the player's gold and increments turn, before the shop is
+        rolled for the new turn."""
         # Reset gold
         self.gold = self._GOLD_PER_TURN
 
-        # Increment turn and roll shop
+        # Increment turn
         self._turn += 1
         self.shop.turn = self._turn
-        self.roll(is_turn_start=True)
 
-        # Call on turn start
+    def _turn_start(self):
+        """Calls turn start abilities, after the shop is rolled for the new
+        turn."""
         for i in range(len(self.deck)):
             if self.deck[i]:
                 self.deck[i].on_turn_start()
 
     @check_game_over
-    def challenge(self, other_game_instance) -> None:
+    def challenge(self, other_game_instance, roll: bool = True) -> None:
         """
         Challenge another game instance to battle.
 
@@ -906,6 +1217,11 @@ class Game:
         other_game_instance: Game
             The opponent game instance.
 
+        roll: bool
+            If False, the challenger's shop is not rolled for its new turn,
+            and its turn start abilities are not called, so that the caller
+            can roll many shops at once (see `_new_turn`). Default is True.
+
         Examples
         ----------
         Player 1 (`p1`) challenges player 2 (`p2`) to a battle:
@@ -1034,6 +1350,42 @@ class Game:
         |lvl: 1    ||lvl: 1    ||lvl: 1    ||          ||          ||          ||          |
         0----------01----------12----------23----------34----------45----------56----------6
         """
+        self._battle_setup(other_game_instance)
+        result = self._battle_rounds(other_game_instance)
+        self._battle_cleanup(other_game_instance, result)
+        self._last_op_success = True
+
+        # Get new turn for challenger
+        if self.display:
+            challenger_str = [
+                '__   __        ',
+                '\\ \\ / /__ _  _ ',
+                ' \\ V / _ \\ || |',
+                '  |_|\\___/\\_,_|'
+            ]
+            print('\n'.join(challenger_str))
+        self._new_turn(roll)
+
+        # Get new turn for foe
+        if self.display:
+            opponent_str = [
+                ' ___         ',
+                '| __|__  ___ ',
+                '| _/ _ \\/ -_)',
+                '|_|\\___/\\___|'
+            ]
+            print('\n'.join(opponent_str))
+        other_game_instance._new_turn()
+
+    def _battle_setup(self, other_game_instance):
+        """Calls turn end and battle start abilities and readies both decks
+        for battle."""
+        self._turn_end(other_game_instance)
+        self._battle_start(other_game_instance)
+
+    def _turn_end(self, other_game_instance):
+        """Tells the pets of both decks that they are in battle and calls
+        their turn end abilities."""
         # Tell each pet they are now in battle
         for pet in self.deck:
             if pet:
@@ -1059,6 +1411,8 @@ class Game:
         if self.debug:
             print('Called end turn')
 
+    def _battle_start(self, other_game_instance):
+        """Readies both decks for battle and calls battle start abilities."""
         # Make copies of each game instance's deck
         self.deck.prep_for_battle()
         other_game_instance.deck.prep_for_battle()
@@ -1086,8 +1440,36 @@ class Game:
         if self.debug:
             print('Called on battle start')
 
+    def _battle_rounds(self, other_game_instance) -> MatchResult:
+        """
+        Fights rounds until one or both decks are depleted, and returns the
+        result of the battle for this game.
+
+        A battle that returns to a state it has been in before (e.g., when
+        both leading pets have no attack) can never be decided, so it is
+        called a draw, as is a battle that lasts `max_battle_rounds` rounds.
+        """
+        seen_states = set()
+        n_rounds = 0
+        stalled = False
+
         # Battle until one or both decks are depleted
         while not self.deck.is_empty() and not other_game_instance.deck.is_empty():
+            state = (self.deck.battle_state(),
+                     other_game_instance.deck.battle_state())
+            if state in seen_states:
+                self._n_stalemates += 1
+                other_game_instance._n_stalemates += 1
+                stalled = True
+                break
+            if n_rounds >= self.max_battle_rounds:
+                self._n_round_caps += 1
+                other_game_instance._n_round_caps += 1
+                stalled = True
+                break
+            seen_states.add(state)
+            n_rounds += 1
+
             if self.debug:
                 print(self.deck)
                 print(other_game_instance.deck)
@@ -1169,10 +1551,31 @@ class Game:
             print(self.deck)
             print(other_game_instance.deck)
 
+        self._n_battle_rounds = n_rounds
+        other_game_instance._n_battle_rounds = n_rounds
+
+        # Determine the result before the decks are restored
+        my_deck_empty = self.deck.is_empty()
+        their_deck_empty = other_game_instance.deck.is_empty()
+        if stalled or my_deck_empty == their_deck_empty:
+            return MatchResult.DRAW
+        elif their_deck_empty:
+            return MatchResult.WON
+        else:
+            return MatchResult.LOST
+
+    def _battle_cleanup(self, other_game_instance, result: MatchResult):
+        """Restores both decks, calls battle end abilities, and assigns
+        rewards based on the battle result."""
         # Restore both decks
         self.deck.battle_cleanup()
         other_game_instance.deck.battle_cleanup()
 
+        self._battle_end(other_game_instance, result)
+
+    def _battle_end(self, other_game_instance, result: MatchResult):
+        """Calls battle end abilities and assigns rewards based on the battle
+        result."""
         # Cast battle end abilities
         for pet in self.deck:
             if pet:
@@ -1185,35 +1588,10 @@ class Game:
         self.cast_all_abilities(other_game_instance)
 
         # Assign rewards based on battle result
-        if not self.deck.is_empty() and other_game_instance.deck.is_empty():
+        if result == MatchResult.WON:
             self.trophies += 1
             other_game_instance.lives -= 1
-            self._match_history.append(MatchResult.WON)
-        elif self.deck.is_empty() and not other_game_instance.deck.is_empty():
+        elif result == MatchResult.LOST:
             other_game_instance.trophies += 1
             self.lives -= 1
-            self._match_history.append(MatchResult.LOST)
-        else:
-            self._match_history.append(MatchResult.DRAW)
-
-        # Get new turn for challenger
-        if self.display:
-            challenger_str = [
-                '__   __        ',
-                '\\ \\ / /__ _  _ ',
-                ' \\ V / _ \\ || |',
-                '  |_|\\___/\\_,_|'
-            ]
-            print('\n'.join(challenger_str))
-        self._new_turn()
-
-        # Get new turn for foe
-        if self.display:
-            opponent_str = [
-                ' ___         ',
-                '| __|__  ___ ',
-                '| _/ _ \\/ -_)',
-                '|_|\\___/\\___|'
-            ]
-            print('\n'.join(opponent_str))
-        other_game_instance._new_turn()
+        self._match_history.append(result)
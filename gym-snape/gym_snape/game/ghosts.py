@@ -0,0 +1,371 @@
+"""
+Defines ghosts: frozen pre-battle decks that can be battled in place of a live
+opponent.
+
+Ghosts are kept either in memory (`GhostPool`) or in a memory-mapped library on
+disk that can be shared by many processes (`GhostLibrary`).
+"""
+
+__all__ = ['Ghost', 'GhostPool', 'GhostLibrary', 'GHOST_DTYPE', 'build_game']
+
+# Standard library imports
+from collections import namedtuple
+from copy import deepcopy
+import mmap
+import os
+from typing import Dict, List, Optional, Tuple
+
+# Local application imports
+from gym_snape.game.game import Game
+from gym_snape.game.registry import decode_pet, encode_pet
+
+# Third party imports
+import numpy as np
+
+
+# A frozen copy of a deck's pets, along with the turn number and trophy count
+# of the game that the deck was taken from
+Ghost = namedtuple('Ghost', field_names=['pets', 'turn', 'trophies'])
+
+
+def freeze_deck(game: Game) -> Tuple:
+    """
+    Returns a copy of the game's deck pets, detached from the game.
+
+    The copied pets do not reference the game, its deck, its shop, or the deck
+    of the last opponent.
+    """
+    pets = deepcopy(list(game.deck))
+    for pet in pets:
+        if pet:
+            pet.assign_game(None)
+            pet.assign_friends(None)
+            pet.assign_enemies(None)
+            pet.assign_shop(None)
+    return tuple(pets)
+
+
+def build_game(ghost: Ghost) -> Game:
+    """
+    Creates a game instance whose deck holds a fresh copy of the ghost's pets.
+
+    The returned game can be passed to `Game.challenge`. The ghost itself is
+    left untouched, so it can be battled any number of times. The shop is not
+    rolled.
+    """
+    game = Game.__new__(Game)
+    game._setup()
+    game._turn = ghost.turn
+    game._n_trophies = ghost.trophies
+    for i, pet in enumerate(deepcopy(ghost.pets)):
+        game.deck._pets[i] = pet
+        if pet:
+            pet.assign_game(game)
+            pet.assign_friends(game.deck)
+            pet.assign_shop(game.shop)
+    return game
+
+
+class GhostPool:
+    """
+    An append-only store of ghosts, indexed by turn number and trophy count.
+
+    Parameters
+    ----------
+    seed: int | None
+        Seed for the random number generator used by `sample`.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._by_turn: Dict[int, List[Ghost]] = {}
+        self._by_turn_and_trophies: Dict[Tuple[int, int], List[Ghost]] = {}
+        self._n_ghosts = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self._n_ghosts
+
+    @property
+    def turns(self) -> List[int]:
+        """The turn numbers for which at least one ghost is stored."""
+        return sorted(self._by_turn.keys())
+
+    def count(self, turn: int, trophies: Optional[int] = None) -> int:
+        """Returns the number of ghosts stored for the given turn/trophies."""
+        self._refresh_if_missing(turn, trophies)
+        if trophies is None:
+            return len(self._by_turn.get(turn, []))
+        else:
+            return len(self._by_turn_and_trophies.get((turn, trophies), []))
+
+    def add(self, game: Game) -> Ghost:
+        """
+        Freezes the game's current deck and appends it to the pool.
+
+        Parameters
+        ----------
+        game: Game
+            The game to take the deck from, typically right before it battles.
+        """
+        ghost = Ghost(freeze_deck(game), game.turn, game.trophies)
+        self._by_turn.setdefault(ghost.turn, []).append(ghost)
+        key = (ghost.turn, ghost.trophies)
+        self._by_turn_and_trophies.setdefault(key, []).append(ghost)
+        self._n_ghosts += 1
+        return ghost
+
+    def sample(self, turn: int,
+               trophies: Optional[int] = None) -> Optional[Ghost]:
+        """
+        Samples a ghost uniformly at random.
+
+        Parameters
+        ----------
+        turn: int
+            The turn to sample from. If no ghost is stored for this turn, the
+            latest earlier turn that has ghosts is used instead.
+
+        trophies: int | None
+            If given, only ghosts with this trophy count are considered, unless
+            there are none at the chosen turn, in which case any ghost from
+            that turn may be returned.
+
+        Returns
+        ----------
+        The sampled ghost, or None if no ghost exists at or before `turn`.
+        """
+        candidates = [t for t in self._by_turn if t <= turn]
+        if len(candidates) == 0:
+            return None
+        turn = max(candidates)
+
+        ghosts = self._by_turn_and_trophies.get((turn, trophies))
+        if not ghosts:
+            ghosts = self._by_turn[turn]
+        return ghosts[self.rng.integers(len(ghosts))]
+
+
+# Fixed-width binary record of a ghost. Each deck slot holds the class code
+# and stats of a pet (see `gym_snape.game.registry`), with code 0 for an empty
+# slot. Stats are stored as unsigned bytes and clipped to [0, 255].
+SLOT_FIELDS = ('pet', 'attack', 'health', 'attack_buff', 'health_buff',
+               'level', 'experience', 'effect')
+SLOT_DTYPE = np.dtype([(name, 'u1') for name in SLOT_FIELDS])
+GHOST_DTYPE = np.dtype([
+    ('turn', '<u2'),
+    ('trophies', 'u1'),
+    ('reserved', 'u1'),
+    ('slots', SLOT_DTYPE, (5,)),
+])
+
+# Identifies the data file of a ghost library: magic, format version, and
+# record size
+_LIBRARY_VERSION = 1
+_LIBRARY_HEADER = (b'SNAPEGHO' +
+                   _LIBRARY_VERSION.to_bytes(4, 'little') +
+                   GHOST_DTYPE.itemsize.to_bytes(4, 'little'))
+_OFFSET_DTYPE = np.dtype('<u8')
+
+
+def encode_ghost(game: Game) -> np.ndarray:
+    """Returns the game's current deck as a record of type `GHOST_DTYPE`."""
+    record = np.zeros((), dtype=GHOST_DTYPE)
+    record['turn'] = min(game.turn, np.iinfo(np.uint16).max)
+    record['trophies'] = game.trophies
+    for i, pet in enumerate(game.deck):
+        fields = encode_pet(pet)[:len(SLOT_FIELDS)]
+        record['slots'][i] = tuple(min(max(v, 0), 255) for v in fields)
+    return record
+
+
+def decode_ghost(record: np.ndarray) -> Ghost:
+    """Creates a ghost from a record of type `GHOST_DTYPE`."""
+    pets = tuple(decode_pet(*slot) for slot in record['slots'].tolist())
+    return Ghost(pets, int(record['turn']), int(record['trophies']))
+
+
+class _MappedFile:
+    """
+    An append-only file whose contents are read through a memory map.
+
+    Appends use O_APPEND, so concurrent appends of whole records from several
+    processes never interleave and no lock is needed. The map is recreated
+    lazily whenever a read goes past the end of the current map.
+    """
+
+    def __init__(self, path: str, header: bytes = b''):
+        if header and not os.path.exists(path):
+            # Create the file with its header atomically, so other processes
+            # never observe a file without a header
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                f.write(header)
+            try:
+                os.link(tmp, path)
+            except FileExistsError:
+                pass
+            finally:
+                os.remove(tmp)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        self._map = None
+        if header and self.read(0, len(header)) != header:
+            raise ValueError(f'{path} is not compatible with this version')
+
+    def __del__(self):
+        try:
+            os.close(self._fd)
+        except (AttributeError, OSError):
+            pass
+
+    def size(self) -> int:
+        return os.fstat(self._fd).st_size
+
+    def append(self, data: bytes) -> int:
+        """Appends the data and returns the offset it was written at."""
+        os.write(self._fd, data)
+        return os.lseek(self._fd, 0, os.SEEK_CUR) - len(data)
+
+    def read(self, offset: int, n_bytes: int) -> memoryview:
+        """Returns a view of `n_bytes` bytes starting at `offset`."""
+        end = offset + n_bytes
+        if self._map is None or end > len(self._map):
+            size = self.size()
+            if end > size:
+                raise IndexError(f'read past the end of the file ({size})')
+            self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        return memoryview(self._map)[offset:end]
+
+
+class GhostLibrary:
+    """
+    An append-only store of ghosts in memory-mapped files on disk.
+
+    Each ghost is a fixed-width record of type `GHOST_DTYPE` in the data file
+    `ghosts.bin`. For every turn number and trophy count, an index file
+    `turn_{turn}_trophies_{trophies}.idx` lists the byte offsets of the
+    matching records. Any number of processes may open the same library to
+    append and sample concurrently: pages are shared through the OS page cache
+    and nothing is ever loaded into memory as a whole.
+
+    The interface is the same as that of `GhostPool`, so a library can be
+    assigned to an environment in place of a pool.
+
+    Parameters
+    ----------
+    path: str
+        The directory holding the library. Created if it does not exist.
+
+    seed: int | None
+        Seed for the random number generator used by `sample`.
+    """
+
+    def __init__(self, path: str, seed: Optional[int] = None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._data = _MappedFile(os.path.join(path, 'ghosts.bin'),
+                                 header=_LIBRARY_HEADER)
+        self._indices: Dict[Tuple[int, int], _MappedFile] = {}
+        self._trophies_at_turn: Dict[int, List[int]] = {}
+        self.rng = np.random.default_rng(seed)
+        self.refresh()
+
+    def __len__(self) -> int:
+        return (self._data.size() - len(_LIBRARY_HEADER)) // GHOST_DTYPE.itemsize
+
+    @property
+    def turns(self) -> List[int]:
+        """The turn numbers for which at least one ghost is stored."""
+        return sorted(self._trophies_at_turn.keys())
+
+    def refresh(self):
+        """
+        Picks up index files created by other processes. Called by `count`
+        and `sample` whenever the requested turn/trophies is not known yet.
+        """
+        for entry in os.scandir(self.path):
+            name = entry.name
+            if name.startswith('turn_') and name.endswith('.idx'):
+                _, turn, _, trophies = name[:-len('.idx')].split('_')
+                self._get_index(int(turn), int(trophies))
+
+    def count(self, turn: int, trophies: Optional[int] = None) -> int:
+        """Returns the number of ghosts stored for the given turn/trophies."""
+        self._refresh_if_missing(turn, trophies)
+        if trophies is None:
+            trophies = self._trophies_at_turn.get(turn, [])
+        else:
+            trophies = [trophies]
+        n_bytes = sum(self._indices[(turn, t)].size() for t in trophies
+                      if (turn, t) in self._indices)
+        return n_bytes // _OFFSET_DTYPE.itemsize
+
+    def add(self, game: Game) -> Ghost:
+        """
+        Encodes the game's current deck and appends it to the library.
+
+        Parameters
+        ----------
+        game: Game
+            The game to take the deck from, typically right before it battles.
+        """
+        record = encode_ghost(game)
+        offset = self._data.append(record.tobytes())
+        index = self._get_index(int(record['turn']), int(record['trophies']))
+        index.append(np.array(offset, dtype=_OFFSET_DTYPE).tobytes())
+        return decode_ghost(record)
+
+    def sample(self, turn: int,
+               trophies: Optional[int] = None) -> Optional[Ghost]:
+        """
+        Samples a ghost uniformly at random.
+
+        See `GhostPool.sample` for the meaning of the parameters.
+        """
+        self._refresh_if_missing(turn, trophies)
+        candidates = [t for t in self._trophies_at_turn if t <= turn]
+        if len(candidates) == 0:
+            return None
+        turn = max(candidates)
+
+        # Pick an index file, weighted by the number of ghosts it lists
+        key = (turn, trophies)
+        if key in self._indices and self._indices[key].size() > 0:
+            keys = [(turn, trophies)]
+        else:
+            keys = [(turn, t) for t in self._trophies_at_turn[turn]]
+        sizes = [self._indices[k].size() // _OFFSET_DTYPE.itemsize
+                 for k in keys]
+        k = int(self.rng.integers(sum(sizes)))
+        for key, size in zip(keys, sizes):
+            if k < size:
+                break
+            k -= size
+
+        # Look up the record's offset, then the record itself
+        item = _OFFSET_DTYPE.itemsize
+        buffer = self._indices[key].read(k * item, item)
+        offset = int(np.frombuffer(buffer, dtype=_OFFSET_DTYPE)[0])
+        buffer = self._data.read(offset, GHOST_DTYPE.itemsize)
+        return decode_ghost(np.frombuffer(buffer, dtype=GHOST_DTYPE)[0])
+
+    def _refresh_if_missing(self, turn: int, trophies: Optional[int]):
+        """
+        Picks up the index files of other processes if none is open yet for
+        the turn/trophies (for the turn alone, if trophies is None).
+        """
+        if trophies is None:
+            missing = turn not in self._trophies_at_turn
+        else:
+            missing = (turn, trophies) not in self._indices
+        if missing:
+            self.refresh()
+
+    def _get_index(self, turn: int, trophies: int) -> _MappedFile:
+        """Returns the index file for the turn/trophies, opening it if needed."""
+        key = (turn, trophies)
+        if key not in self._indices:
+            name = f'turn_{turn}_trophies_{trophies}.idx'
+            self._indices[key] = _MappedFile(os.path.join(self.path, name))
+            self._trophies_at_turn.setdefault(turn, []).append(trophies)
+        return self._indices[key]
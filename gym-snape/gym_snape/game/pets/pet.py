@@ -4,7 +4,9 @@ from functools import wraps
 from typing import Callable, final, Final, Optional, ParamSpec, TypeVar
 
 # Local application imports
+from gym_snape.game import profiling
 from gym_snape.game.effects import effects
+from gym_snape.game.utils import WeakAttribute
 
 # Typing definitions
 P = ParamSpec('P')
@@ -17,7 +19,11 @@ def capture_action(bound_method: Callable[P, T]) -> Callable[P, T]:
     @wraps(bound_method)
     def _impl(self, *args: P.args, **kwargs: P.kwargs) -> T:
         if self.in_battle:  # append an entry to the game's ability log
+            if profiling.profiler is not None:
+                profiling.profiler.trigger(self, bound_method)
             self._game.add_ability_to_cast((self, bound_method, args, kwargs))
+        elif profiling.profiler is not None:  # call and time the method
+            profiling.profiler.call(self, bound_method, args, kwargs)
         else:  # call the method immediately
             bound_method(self, *args, **kwargs)
     return _impl
@@ -30,6 +36,8 @@ def duplicate_action(bound_method: Callable[P, T]) -> Callable[P, T]:
     def _impl(self, *args: P.args, **kwargs: P.kwargs) -> T:
         bound_method(self, *args, **kwargs)  # cast ability normally
         if self.in_battle and self._duplicate_as > 0:  # temporarily boost level
+            if profiling.profiler is not None:
+                profiling.profiler.duplicate(self, bound_method)
             prev_level = self._level
             self._level = self._duplicate_as
             bound_method(self, *args, **kwargs)  # cast ability again
@@ -45,7 +53,16 @@ class Pet:
     characters must be unique among all pets.
     """
 
+    # Back-references to the game, decks, and shop this pet is used in
+    _game = WeakAttribute()
+    _friends = WeakAttribute()
+    _enemies = WeakAttribute()
+    _shop = WeakAttribute()
+
     def __init__(self):
+        # Incremented whenever a stat shown in observations changes
+        self._version = 0
+
         self._MAX_ATTACK: Final = 50
         self._MAX_HEALTH: Final = 50
         self._EXP_TO_LEVEL_UP: Final = (2, 3)
@@ -178,6 +195,14 @@ class Pet:
         """
         return int(''.join([str(ord(ch)) for ch in self._name[:3]]))
 
+    @property
+    def version(self) -> int:
+        """
+        A counter that changes whenever the pet's stats change, so that
+        observations can tell whether the pet needs to be encoded again.
+        """
+        return self._version
+
     @property
     def health(self):
         return self._health
@@ -195,6 +220,7 @@ class Pet:
                 self.effect = None
             prev_health = self.health
             self._health = min(value, self._MAX_HEALTH)
+            self._version += 1
             if self.health <= 0 and 0 < prev_health:
                 self.on_faint()
             if 0 < self.health and self.health < prev_health:
@@ -211,6 +237,7 @@ class Pet:
         if type(value) == int:
             # Does not need a cap because health is capped
             self._health_buff = value
+            self._version += 1
         else:
             raise TypeError('health buff must be an integer')
 
@@ -222,6 +249,7 @@ class Pet:
     def attack(self, value: int):
         if type(value) == int:
             self._attack = min(value, self._MAX_ATTACK)
+            self._version += 1
         else:
             raise TypeError('attack must be an integer')
 
@@ -234,6 +262,7 @@ class Pet:
         if type(value) == int:
             # Does not need a cap because attack is capped
             self._attack_buff = value
+            self._version += 1
         else:
             raise TypeError('attack buff must be an integer')
 
@@ -264,6 +293,7 @@ class Pet:
             # At max level, experience is also maxed out
             if self.level == self._MAX_LEVEL:
                 self._experience = self._EXP_TO_LEVEL_UP[-1]
+            self._version += 1
         else:
             raise TypeError('argument must be castable to integer')
 
@@ -279,6 +309,7 @@ class Pet:
     def effect(self, value: Optional[str]):
         if value is None or value in effects:
             self._effect = value
+            self._version += 1
         else:
             raise ValueError(f'{value} not in {effects}')
 
@@ -359,6 +390,15 @@ class Pet:
             self._health = health
             self._attack = attack
             self._effect = None
+            self._version += 1
+
+    def battle_key(self) -> tuple:
+        """
+        Returns a hashable snapshot of this pet's battle-relevant state: class,
+        attack, health, and effect. Pets with hidden state that changes during
+        battle add it, so that `Deck.battle_state` can tell the states apart.
+        """
+        return (type(self), self._attack, self._health, self._effect)
 
     """
     The following functions are to be overriden according to each pet's unique
@@ -372,6 +412,7 @@ class Pet:
     def on_buy(self, *args, **kwargs):
         """What happens when this pet is bought from the shop."""
         self._gold_cost = 1
+        self._version += 1
 
     def on_eat_food(self, *args, **kwargs):
         """What happens when this pet eats food."""
@@ -423,6 +464,7 @@ class Pet:
         # Resets the health and attack buffs
         self._health_buff = 0
         self._attack_buff = 0
+        self._version += 1
 
     def on_battle_start(self, *args, **kwargs):
         """What happens when the battle phase starts."""
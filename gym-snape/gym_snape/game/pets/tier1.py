@@ -7,13 +7,11 @@ __all__ = ['Ant', 'Beaver', 'Cricket', 'Fish', 'Horse', 'Mosquito', 'Otter',
            'Pig', 'Sloth']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.pets import Pet
 from gym_snape.game.pets import tokens
 from gym_snape.game.pets.pet import capture_action, duplicate_action
 
-# Third party imports
-import numpy as np
-
 
 class Ant(Pet):
     def __init__(self):
@@ -31,7 +29,7 @@ class Ant(Pet):
             if friend and id(friend) != id(self):
                 choices.append(friend)
         if len(choices) >= 1:
-            chosen = np.random.choice(choices, replace=False)
+            chosen = choices[draws.choice(len(choices), replace=False)]
             chosen.attack += 2 * self.level
             chosen.health += 1 * self.level
 
@@ -52,7 +50,8 @@ class Beaver(Pet):
                 choices.append(friend)
         n_chosen = min(len(choices), 2)
         if n_chosen >= 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.health += 1 * self.level
 
@@ -118,7 +117,8 @@ class Mosquito(Pet):
         choices = [enemy for enemy in self._enemies if enemy]
         n_chosen = min(len(choices), self.level)
         if n_chosen >= 1:
-            enemies = np.random.choice(choices, n_chosen, replace=False)
+            enemies = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for enemy in enemies:
                 enemy.health -= 1 * self.level
 
@@ -139,7 +139,7 @@ class Otter(Pet):
                 choices.append(friend)
         n_chosen = min(len(choices), self.level)
         if n_chosen >= 1:
-            friend = np.random.choice(choices)
+            friend = choices[draws.choice(len(choices))]
             friend.health += 1 * self.level
             friend.attack += 1 * self.level
 
@@ -10,14 +10,12 @@ __all__ = ['Crab', 'Dodo', 'Elephant', 'Flamingo', 'Hedgehog', 'Peacock',
 import math
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game import pets
 from gym_snape.game.pets import Pet
 from gym_snape.game.pets import tokens
 from gym_snape.game.pets.pet import capture_action, duplicate_action
 
-# Third party imports
-import numpy as np
-
 
 class Crab(Pet):
     def __init__(self):
@@ -161,7 +159,8 @@ class Shrimp(Pet):
                 choices.append(friend)
         n_chosen = min(len(choices), 1)
         if n_chosen == 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.health += 1 * self.level
 
@@ -191,9 +190,13 @@ class Spider(Pet):
             pets.tier3.Snail,
             pets.tier3.Turtle
         ]
-        spawn = np.random.choice(choices, 1)[0]()
+        spawn = choices[draws.choice(len(choices), 1)[0]]()
         spawn.zombify(2, 2)
         spawn._level = self.level
+        spawn._version += 1
+        spawn.in_battle = self.in_battle
+        spawn.assign_game(self._game)
+        spawn.assign_shop(self._shop)
         spawn.assign_friends(self._friends)
         spawn.assign_enemies(self._enemies)
         self._friends.insert(i, spawn)
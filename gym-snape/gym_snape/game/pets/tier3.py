@@ -7,14 +7,12 @@ __all__ = ['Badger', 'BlowFish', 'Camel', 'Dog', 'Giraffe', 'Kangaroo',
            'Ox', 'Rabbit', 'Sheep', 'Snail', 'Turtle']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.game import MatchResult
 from gym_snape.game.pets import Pet
 from gym_snape.game.pets import tokens
 from gym_snape.game.pets.pet import capture_action, duplicate_action
 
-# Third party imports
-import numpy as np
-
 
 class Badger(Pet):
     def __init__(self):
@@ -59,7 +57,8 @@ class BlowFish(Pet):
         choices = [enemy for enemy in self._enemies if enemy]
         n_chosen = min(len(choices), 1)
         if n_chosen == 1:
-            chosen = np.random.choice(choices, n_chosen, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_chosen, replace=False)]
             for c in chosen:
                 c.health -= 2 * self.level
 
@@ -95,7 +94,7 @@ class Dog(Pet):
     def on_friend_summoned(self, *args, **kwargs):
         """Gain +(1*level) health or attack (temporary if in battle)."""
         super().on_friend_summoned()
-        coin_flip = np.random.randint(2)
+        coin_flip = draws.integers(2)
         if coin_flip == 0:
             self.health += 1 * self.level
         else:
@@ -244,5 +243,6 @@ class Turtle(Pet):
         while i < len(self._friends) and num_affected < self.level:
             if self._friends[i]:
                 self._friends[i]._effect = 'Mln'
+                self._friends[i]._version += 1
                 num_affected += 1
             i += 1
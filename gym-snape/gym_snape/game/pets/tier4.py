@@ -113,6 +113,7 @@ class Parrot(Pet):
             friend_ahead.zombify(self.health, self.attack)
             # Change friend's name
             friend_ahead._name = self._name
+            friend_ahead._version += 1
 
             # Replace self with friend
             del self._friends[i]
@@ -180,6 +181,7 @@ class Skunk(Pet):
             new_health = self._enemies[target].health * ability_modifier
             new_health = math.ceil(new_health)
             self._enemies[target]._health = new_health
+            self._enemies[target]._version += 1
 
 
 class Squirrel(Pet):
@@ -205,6 +207,10 @@ class Whale(Pet):
         self.health = 6
         self._swallowed = None
 
+    def battle_key(self) -> tuple:
+        swallowed = None if self._swallowed is None else type(self._swallowed)
+        return super().battle_key() + (swallowed,)
+
     @capture_action
     def on_battle_start(self):
         """Swallow friend ahead, triggering their on faint ability."""
@@ -223,6 +229,8 @@ class Whale(Pet):
         if self._swallowed:
             self._swallowed.__init__()
             self._swallowed._level = self.level
+            self._swallowed._version += 1
+            self._swallowed.in_battle = self.in_battle
             self._swallowed.assign_friends(self._friends)
             self._swallowed.assign_enemies(self._enemies)
             super().on_faint()
@@ -7,15 +7,13 @@ __all__ = ['Cow', 'Crocodile', 'Monkey', 'Rhino', 'Scorpion', 'Seal', 'Shark',
            'Turkey']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game.food import Food
 from gym_snape.game.food.misc import Milk
 from gym_snape.game.pets import Pet
 from gym_snape.game.shop import ShopItem
 from gym_snape.game.pets.pet import capture_action, duplicate_action
 
-# Third party imports
-import numpy as np
-
 
 class Cow(Pet):
     def __init__(self):
@@ -113,7 +111,8 @@ class Seal(Pet):
                 choices.append(friend)
         n_choices = min(len(choices), 2)
         if n_choices >= 1:
-            chosen = np.random.choice(choices, n_choices, replace=False)
+            chosen = [choices[i] for i in draws.choice(
+                len(choices), n_choices, replace=False)]
             for c in chosen:
                 c.health += 1 * self.level
                 c.attack += 1 * self.level
@@ -143,7 +142,7 @@ class Turkey(Pet):
     @capture_action
     def on_friend_summoned(self, index):
         """Give the friend +(3*level)/+(3*level)."""
-        if id(self._friends[index]) != id(self):
+        if self._friends[index] and id(self._friends[index]) != id(self):
             super().on_friend_summoned(index)
             self._friends[index].attack += 3 * self.level
             self._friends[index].health += 3 * self.level
@@ -7,14 +7,12 @@ __all__ = ['Boar', 'Cat', 'Dragon', 'Fly', 'Gorilla', 'Leopard', 'Mammoth',
            'Snake', 'Tiger']
 
 # Local application imports
+from gym_snape.game import draws
 from gym_snape.game import pets
 from gym_snape.game.pets import Pet
 from gym_snape.game.pets import tokens
 from gym_snape.game.pets.pet import capture_action, duplicate_action
 
-# Third party imports
-import numpy as np
-
 
 class Boar(Pet):
     def __init__(self):
@@ -105,6 +103,9 @@ class Fly(Pet):
         super().on_battle_start()
         self._triggers = 3
 
+    def battle_key(self) -> tuple:
+        return super().battle_key() + (self._triggers,)
+
     @capture_action
     def on_friend_faint(self, index):
         """
@@ -130,6 +131,9 @@ class Gorilla(Pet):
         super().on_battle_start()
         self._triggers = self.level
 
+    def battle_key(self) -> tuple:
+        return super().battle_key() + (self._triggers,)
+
     @capture_action
     def on_hurt(self):
         """Gain Coconut Shield 1/2/3 times per battle."""
@@ -199,7 +203,8 @@ class Snake(Pet):
             if not in_between and i == index:
                 choices = [enemy for enemy in self._enemies if enemy]
                 if len(choices) >= 1:
-                    enemies = np.random.choice(choices, 1, replace=False)
+                    enemies = [choices[i] for i in draws.choice(
+                        len(choices), 1, replace=False)]
                     for enemy in enemies:
                         enemy.health -= 5 * self.level
 
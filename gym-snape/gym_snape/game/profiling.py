@@ -0,0 +1,173 @@
+"""
+Opt-in profiling of pet abilities.
+
+While a profiler is enabled, the ability decorators in `gym_snape.game.pets.pet`
+and `Game.cast_all_abilities` report to it: how often each pet class triggers
+each ability, how long the abilities take, and how deep the cascades of
+abilities triggering further abilities go. When no profiler is enabled, the
+hooks reduce to a single check of the module-level `profiler`.
+
+Example
+----------
+>>> from gym_snape.game import profiling
+>>> with profiling.profile() as profiler:
+...     game.challenge(other_game)
+>>> print(profiler)
+>>> profiler.write_csv('abilities.csv', sort_by='calls')
+"""
+
+__all__ = ['AbilityProfiler', 'profiler', 'enable', 'disable', 'profile']
+
+# Standard library imports
+from contextlib import contextmanager
+import csv
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# The enabled profiler, if any. The hooks read this on every call.
+profiler: Optional['AbilityProfiler'] = None
+
+_COLUMNS = ('pet', 'ability', 'triggers', 'calls', 'duplicates', 'seconds',
+            'mean')
+
+
+class AbilityProfiler:
+    """
+    Counts and times ability triggers per pet class and ability.
+
+    For every (pet class, ability) pair, the following are recorded:
+        - triggers: times the ability was triggered in battle and queued
+        - calls: times the ability was actually run, in or out of battle
+        - duplicates: extra runs caused by `duplicate_action` (e.g., Tiger)
+        - seconds: total time spent running the ability
+
+    For every call of `Game.cast_all_abilities`, the cascade depth (the number
+    of rounds of casting needed until no more abilities were triggered) is
+    recorded as well.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], list] = {}
+        self._depths: Dict[int, int] = {}
+
+    def _entry(self, pet, ability) -> list:
+        key = (type(pet).__name__, ability.__name__)
+        entry = self._stats.get(key)
+        if entry is None:
+            entry = self._stats[key] = [0, 0, 0, 0.0]
+        return entry
+
+    def trigger(self, pet, ability):
+        """Records that an ability was queued to be cast in battle."""
+        self._entry(pet, ability)[0] += 1
+
+    def duplicate(self, pet, ability):
+        """Records that an ability was run a second time by duplication."""
+        self._entry(pet, ability)[2] += 1
+
+    def call(self, pet, ability, args, kwargs):
+        """Runs an ability, timing it."""
+        entry = self._entry(pet, ability)
+        start = time.perf_counter()
+        try:
+            return ability(pet, *args, **kwargs)
+        finally:
+            entry[1] += 1
+            entry[3] += time.perf_counter() - start
+
+    def cascade(self, depth: int):
+        """Records the cascade depth of one `cast_all_abilities` call."""
+        self._depths[depth] = self._depths.get(depth, 0) + 1
+
+    @property
+    def cascade_depths(self) -> Dict[int, int]:
+        """Cascade depths mapped to the number of times each occurred."""
+        return dict(sorted(self._depths.items()))
+
+    def rows(self, sort_by: str = 'seconds',
+             descending: bool = True) -> List[Dict]:
+        """
+        Returns one row per (pet class, ability) pair.
+
+        Parameters
+        ----------
+        sort_by: str
+            The column to sort by; one of 'pet', 'ability', 'triggers',
+            'calls', 'duplicates', 'seconds', or 'mean'.
+
+        descending: bool
+            If True (default), sort from greatest to least.
+        """
+        if sort_by not in _COLUMNS:
+            raise ValueError(f'sort_by must be one of {_COLUMNS}')
+        rows = []
+        for (pet, ability), (triggers, calls, dups, seconds) in \
+                self._stats.items():
+            rows.append({
+                'pet': pet,
+                'ability': ability,
+                'triggers': triggers,
+                'calls': calls,
+                'duplicates': dups,
+                'seconds': seconds,
+                'mean': seconds / calls if calls else 0.0,
+            })
+        rows.sort(key=lambda row: row[sort_by], reverse=descending)
+        return rows
+
+    def write_csv(self, path: str, sort_by: str = 'seconds',
+                  descending: bool = True):
+        """Writes the rows (see `rows`) to a CSV file."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.rows(sort_by, descending))
+
+    def reset(self):
+        """Discards everything recorded so far."""
+        self._stats = {}
+        self._depths = {}
+
+    def format(self, sort_by: str = 'seconds', descending: bool = True) -> str:
+        """Returns the rows (see `rows`) and cascade depths as a table."""
+        lines = [f'{"pet":<16} {"ability":<20} {"triggers":>9} {"calls":>9} '
+                 f'{"dups":>6} {"total (s)":>10} {"mean (us)":>10}']
+        for row in self.rows(sort_by, descending):
+            lines.append(f'{row["pet"]:<16} {row["ability"]:<20} '
+                         f'{row["triggers"]:>9} {row["calls"]:>9} '
+                         f'{row["duplicates"]:>6} {row["seconds"]:>10.4f} '
+                         f'{row["mean"] * 1e6:>10.1f}')
+        depths = ', '.join(f'{d}: {n}' for d, n in self.cascade_depths.items())
+        lines.append(f'cascade depths: {depths}')
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+def enable(new_profiler: Optional[AbilityProfiler] = None) -> AbilityProfiler:
+    """Enables a profiler (a new one by default) and returns it."""
+    global profiler
+    profiler = AbilityProfiler() if new_profiler is None else new_profiler
+    return profiler
+
+
+def disable():
+    """Disables the enabled profiler, if any."""
+    global profiler
+    profiler = None
+
+
+@contextmanager
+def profile(
+        new_profiler: Optional[AbilityProfiler] = None
+) -> Iterator[AbilityProfiler]:
+    """Enables a profiler for the duration of a `with` block."""
+    previous = profiler
+    try:
+        yield enable(new_profiler)
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
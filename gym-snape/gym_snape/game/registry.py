@@ -0,0 +1,111 @@
+"""
+Assigns compact integer codes to pet classes, food classes, and effects, for
+use in fixed-width encodings of the game state.
+
+Code 0 is reserved for an empty slot (or no effect) in every table. New classes
+must be appended to the end of their table so that existing codes, and
+therefore previously written data, stay valid.
+"""
+
+__all__ = ['PET_CLASSES', 'FOOD_CLASSES', 'EFFECTS', 'pet_code', 'food_code',
+           'effect_code', 'encode_pet', 'decode_pet', 'make_food']
+
+# Standard library imports
+from types import SimpleNamespace
+from typing import Optional, Tuple
+
+# Local application imports
+from gym_snape.game import food, pets
+from gym_snape.game.effects import effects
+from gym_snape.game.food import Food
+from gym_snape.game.pets import Pet, tokens
+
+PET_CLASSES: Tuple = (None,) + tuple(
+    getattr(tier, name)
+    for tier in (pets.tier1, pets.tier2, pets.tier3,
+                 pets.tier4, pets.tier5, pets.tier6)
+    for name in tier.__all__
+) + (tokens.Bus, tokens.Chick, tokens.DirtyRat, tokens.HoneyBee, tokens.Ram,
+     tokens.ZombieCricket, tokens.ZombieFly)
+
+FOOD_CLASSES: Tuple = (None,) + tuple(
+    getattr(tier, name)
+    for tier in (food.tier1, food.tier2, food.tier3,
+                 food.tier4, food.tier5, food.tier6, food.misc)
+    for name in tier.__all__
+)
+
+EFFECTS: Tuple = (None,) + tuple(effects.keys())
+
+_PET_CODES = dict((cls, i) for i, cls in enumerate(PET_CLASSES))
+_FOOD_CODES = dict((cls, i) for i, cls in enumerate(FOOD_CLASSES))
+_EFFECT_CODES = dict((e, i) for i, e in enumerate(EFFECTS))
+
+# Tokens and milk are normally created by a parent pet, whose level/attack
+# determine their stats. When decoding, the stats are overwritten anyway.
+_PARENT = SimpleNamespace(level=1, attack=0)
+_NEEDS_PARENT = frozenset([tokens.Bus, tokens.Chick, tokens.Ram,
+                           tokens.ZombieCricket, tokens.ZombieFly,
+                           food.misc.Milk])
+
+
+def pet_code(pet: Optional[Pet]) -> int:
+    """Returns the code of the pet's class, 0 if there is no pet."""
+    return 0 if pet is None else _PET_CODES[type(pet)]
+
+
+def food_code(item: Optional[Food]) -> int:
+    """Returns the code of the food's class, 0 if there is no food."""
+    return 0 if item is None else _FOOD_CODES[type(item)]
+
+
+def effect_code(effect: Optional[str]) -> int:
+    """Returns the code of the effect, 0 if there is no effect."""
+    return _EFFECT_CODES[effect]
+
+
+def encode_pet(pet: Optional[Pet]) -> Tuple[int, ...]:
+    """
+    Returns the state of a pet as a tuple of integers.
+
+    The fields are: class code, attack, health, attack buff, health buff,
+    level, experience, effect code, and gold cost. An empty slot is all zeros.
+    """
+    if pet is None:
+        return (0,) * 9
+    return (_PET_CODES[type(pet)], pet.attack, pet.health, pet.attack_buff,
+            pet.health_buff, pet.level, pet.experience,
+            _EFFECT_CODES[pet.effect], pet.gold_cost)
+
+
+def decode_pet(code: int, attack: int, health: int, attack_buff: int,
+               health_buff: int, level: int, experience: int, effect: int,
+               gold_cost: int = 3) -> Optional[Pet]:
+    """
+    Creates a pet from the fields returned by `encode_pet`.
+
+    The stats are set directly, so no abilities are triggered. The returned
+    pet is not assigned to any game, deck, or shop.
+    """
+    if code == 0:
+        return None
+    cls = PET_CLASSES[code]
+    pet = cls(_PARENT) if cls in _NEEDS_PARENT else cls()
+    pet._attack = int(attack)
+    pet._health = int(health)
+    pet._attack_buff = int(attack_buff)
+    pet._health_buff = int(health_buff)
+    pet._level = int(level)
+    pet._experience = int(experience)
+    pet._effect = EFFECTS[effect]
+    pet._gold_cost = int(gold_cost)
+    pet._version += 1
+    return pet
+
+
+def make_food(code: int) -> Optional[Food]:
+    """Creates a food item of the class with the given code."""
+    if code == 0:
+        return None
+    cls = FOOD_CLASSES[code]
+    return cls(_PARENT) if cls in _NEEDS_PARENT else cls()
@@ -1,9 +1,10 @@
 # Standard library imports
 from collections import namedtuple
-from typing import Literal
+from functools import lru_cache
+from typing import Literal, Optional, Sequence, Tuple
 
 # Local application imports
-from gym_snape.game import pets, food
+from gym_snape.game import draws, pets, food
 from gym_snape.game.pets.pet import Pet
 from gym_snape.game.food.food import Food
 
@@ -16,6 +17,157 @@ ShopItem = namedtuple('ShopItem',
                       field_names=['item', 'is_frozen'],
                       defaults=[None, False])
 
+# The shop schedule: for each turn, the number of pet shop slots, the number
+# of food shop slots, and the highest available tier (e.g., tier 2 pets/food
+# become available at turn 3). Rows are indexed by turn number; row 0 mirrors
+# turn 1, and from turn `LAST_SCHEDULED_TURN` on, the shop stays the same.
+# Index it with `shop_schedule` to saturate later turns.
+PET_SLOTS, FOOD_SLOTS, TIER = 0, 1, 2
+LAST_SCHEDULED_TURN = 11
+SHOP_SCHEDULE = np.array([
+    (3, 1, 1),  # turn 0
+    (3, 1, 1),  # turn 1
+    (3, 1, 1),
+    (3, 2, 2),  # turn 3
+    (3, 2, 2),
+    (4, 2, 3),  # turn 5
+    (4, 2, 3),
+    (4, 2, 4),  # turn 7
+    (4, 2, 4),
+    (5, 2, 5),  # turn 9
+    (5, 2, 5),
+    (5, 2, 6),  # turn 11
+], dtype=np.int8)
+SHOP_SCHEDULE.setflags(write=False)
+
+# The same rows as tuples of Python integers, which are faster to unpack one
+# turn at a time
+_SCHEDULE_ROWS = tuple(tuple(int(v) for v in row) for row in SHOP_SCHEDULE)
+
+
+def shop_schedule(turn):
+    """
+    Returns the row of the shop schedule of the given turn (see
+    `SHOP_SCHEDULE`), or the rows of an array of turns.
+
+    Example
+    ----------
+    >>> shop_schedule(np.array([1, 4, 20]))[:, TIER]
+    array([1, 2, 6], dtype=int8)
+    """
+    return SHOP_SCHEDULE[np.minimum(turn, LAST_SCHEDULED_TURN)]
+
+
+def _roll_table(roll_rates: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates the roll rates of all tiers into one table for batched rolls
+    (see `draw_shop_rolls`).
+
+    Returns the items of all tiers, followed by None, and the cumulative roll
+    probabilities of each tier offset by the tier number minus 1, so that a
+    uniform draw from [0, 1) plus that offset falls within the tier's items.
+    (Draws are made as integers, so that they can be recorded on a
+    `RandomTape`.)
+    """
+    items, cdfs = [], []
+    for tier in sorted(roll_rates):
+        rates = roll_rates[tier]
+        items.extend(rr.item for rr in rates)
+        cdf = np.cumsum([rr.rate for rr in rates])
+        cdf[-1] = 1  # so that no draw can land in the next tier
+        cdfs.append(cdf + tier - 1)
+    table = np.empty(len(items) + 1, dtype=object)
+    table[:-1] = items
+    return table, np.concatenate(cdfs)
+
+
+@lru_cache(maxsize=None)
+def _roll_tables() -> Tuple[Tuple[np.ndarray, np.ndarray], ...]:
+    """
+    Returns the roll tables of pets and food (see `_roll_table`).
+
+    The tables are built on first use, since some pets import this module
+    before the pet roll rates are defined.
+    """
+    return _roll_table(pets.roll_rates), _roll_table(food.roll_rates)
+
+
+def draw_shop_rolls(rng: np.random.Generator, tiers: np.ndarray,
+                    n_pet_slots: np.ndarray, n_food_slots: np.ndarray,
+                    pet_frozen: np.ndarray, food_frozen: np.ndarray):
+    """
+    Draws the pets and food of K shop rolls at once.
+
+    The pet slots of all shops are drawn in one vectorized operation, and so
+    are the food slots, rather than with two `rng.choice` calls per shop.
+
+    Parameters
+    ----------
+    rng: np.random.Generator
+        The random number generator to draw from.
+
+    tiers: np.ndarray
+        The highest available tier of each shop, of shape (K,).
+
+    n_pet_slots, n_food_slots: np.ndarray
+        The number of available pet and food slots of each shop, of shape
+        (K,).
+
+    pet_frozen, food_frozen: np.ndarray
+        Whether each pet and food slot of each shop is frozen, as boolean
+        arrays of shape (K, number of pet slots) and (K, number of food
+        slots).
+
+    Returns
+    ----------
+    Object arrays of the same shapes as `pet_frozen` and `food_frozen`, which
+    hold the class of the pet or food to put into each slot, or None for the
+    slots that are frozen or not available.
+    """
+    offsets = (np.asarray(tiers) - 1)[:, None]
+    classes = []
+    for (table, cdf), n_slots, frozen in zip(
+            _roll_tables(), (n_pet_slots, n_food_slots),
+            (pet_frozen, food_frozen)):
+        frozen = np.asarray(frozen)
+        uniform = draws.integers(2**32, size=frozen.shape, rng=rng) / 2**32
+        indices = np.searchsorted(cdf, uniform + offsets, side='right')
+        open_slots = np.arange(frozen.shape[1]) < np.asarray(n_slots)[:, None]
+        indices[~open_slots | frozen] = -1  # the None at the end of the table
+        classes.append(table[indices])
+    return tuple(classes)
+
+
+def roll_shops(shops: Sequence['Shop'], rng: np.random.Generator):
+    """
+    Rolls many shops at once, ignoring frozen slots (see `Shop.roll`).
+
+    The pets and food are drawn from `rng` with `draw_shop_rolls`, rather
+    than from each shop's own generator, so a shop rolled this way does not
+    get the items that `Shop.roll` would have given it.
+
+    Parameters
+    ----------
+    shops: Sequence[Shop]
+        The shops to roll.
+
+    rng: np.random.Generator
+        The random number generator to draw from.
+    """
+    if len(shops) == 0:
+        return
+    tiers = np.array([shop._highest_avail_tier for shop in shops])
+    n_pet_slots = np.array([shop._n_pet_slots for shop in shops])
+    n_food_slots = np.array([shop._n_food_slots for shop in shops])
+    pet_frozen = np.array(
+        [[slot.is_frozen for slot in shop._pet_slots] for shop in shops])
+    food_frozen = np.array(
+        [[slot.is_frozen for slot in shop._food_slots] for shop in shops])
+    pets, food = draw_shop_rolls(rng, tiers, n_pet_slots, n_food_slots,
+                                 pet_frozen, food_frozen)
+    for shop, shop_pets, shop_food in zip(shops, pets, food):
+        shop._restock(shop_pets, shop_food)
+
 
 class Shop:
     """
@@ -26,27 +178,15 @@ class Shop:
     """
 
     def __init__(self):
+        # The number of pet/food slots and highest available tier at the
+        # current turn (see `SHOP_SCHEDULE`)
         self._turn = 1
-
-        # Maps turn numbers to the number of pet shop slots available starting
-        # that turn (e.g., 3 slots at turn 1)
-        self._n_pets_at_turn = dict([(1, 3), (3, 3), (5, 4), (9, 5)])
-        self._n_pet_slots = self._n_pets_at_turn[self.turn]
-
-        # Maps turn numbers to the number of food shop slots available starting
-        # that turn (e.g., 1 slot at turn 1)
-        self._n_food_at_turn = dict([(1, 1), (3, 2)])
-        self._n_food_slots = self._n_food_at_turn[self.turn]
-
-        # Maps turn numbers to the highest available tier starting that turn
-        # (e.g, tier 2 pets/food become availale at turn 3)
-        self._avail_tiers_at_turn = dict([(1, 1), (3, 2), (5, 3), (7, 4),
-                                          (9, 5), (11, 6)])
-        self._highest_avail_tier = self._avail_tiers_at_turn[self.turn]
+        (self._n_pet_slots, self._n_food_slots,
+         self._highest_avail_tier) = _SCHEDULE_ROWS[self._turn]
 
         # The lists that actually represent the shop slots
-        max_pet_slots = self._n_pets_at_turn[max(self._n_pets_at_turn.keys())]
-        max_food_slots = self._n_food_at_turn[max(self._n_food_at_turn.keys())]
+        max_pet_slots = int(SHOP_SCHEDULE[:, PET_SLOTS].max())
+        max_food_slots = int(SHOP_SCHEDULE[:, FOOD_SLOTS].max())
         self._pet_slots = [ShopItem()] * max_pet_slots
         self._food_slots = [ShopItem()] * max_food_slots
 
@@ -135,15 +275,36 @@ class Shop:
     def turn(self, value: int):
         if type(value) != int:
             raise TypeError('turn must be an integer value')
+        elif value < 1:
+            raise ValueError('turn must be at least 1')
         else:
             # Update the number of pet/food slots and highest available tier
             self._turn = value
-            self._n_pet_slots = self._n_pets_at_turn.get(
-                self.turn, self._n_pet_slots)
-            self._n_food_slots = self._n_food_at_turn.get(
-                self.turn, self._n_food_slots)
-            self._highest_avail_tier = self._avail_tiers_at_turn.get(
-                self.turn, self._highest_avail_tier)
+            (self._n_pet_slots, self._n_food_slots,
+             self._highest_avail_tier) = _SCHEDULE_ROWS[
+                 min(value, LAST_SCHEDULED_TURN)]
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Resets the shop to its turn 1 state in place, leaving all slots empty
+        and unfrozen.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the random number generator is reseeded with it.
+        """
+        self.turn = 1
+        for i in range(len(self._pet_slots)):
+            self._pet_slots[i] = ShopItem()
+        for i in range(len(self._food_slots)):
+            self._food_slots[i] = ShopItem()
+        self._pet_attack_bonus = 0
+        self._pet_health_bonus = 0
+        self._food_attack_multiplier = 1
+        self._food_health_multiplier = 1
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
 
     @property
     def tier(self):
@@ -219,36 +380,47 @@ class Shop:
         ----------
         See the docstring for `game.Game.roll`
         """
-        # Pick and set pets into non-frozen slots
+        # Pick pets for the available slots
         avail_pets, pet_roll_probs = [], []
         for rr in self._pet_roll_rates[self._highest_avail_tier]:
             avail_pets.append(rr.item)
             pet_roll_probs.append(rr.rate)
-        pets = self.rng.choice(
-            avail_pets,
+        pets = [avail_pets[i] for i in draws.choice(
+            len(avail_pets),
             size=self._n_pet_slots,
             replace=True,
-            p=pet_roll_probs
-        )
-        for i, p in enumerate(pets):
-            if not self._pet_slots[i].is_frozen:
-                pet = p()
-                pet.assign_shop(self)
-                self._pet_slots[i] = ShopItem(pet, False)
+            p=pet_roll_probs,
+            rng=self.rng
+        )]
 
-        # Pick and set food items into non-frozen slots
+        # Pick food items for the available slots
         avail_food, food_roll_probs = [], []
         for rr in self._food_roll_rates[self._highest_avail_tier]:
             avail_food.append(rr.item)
             food_roll_probs.append(rr.rate)
-        food = self.rng.choice(
-            avail_food,
+        food = [avail_food[i] for i in draws.choice(
+            len(avail_food),
             size=self._n_food_slots,
             replace=True,
-            p=food_roll_probs
-        )
+            p=food_roll_probs,
+            rng=self.rng
+        )]
+        self._restock(pets, food)
+
+    def _restock(self, pets: Sequence, food: Sequence):
+        """
+        Puts new instances of the given pet and food classes into the
+        non-frozen slots, in order, and applies the shop modifiers. Slots
+        whose class is None are left as they are.
+        """
+        for i, p in enumerate(pets):
+            if p is not None and not self._pet_slots[i].is_frozen:
+                pet = p()
+                pet.assign_shop(self)
+                self._pet_slots[i] = ShopItem(pet, False)
+
         for i, f, in enumerate(food):
-            if not self._food_slots[i].is_frozen:
+            if f is not None and not self._food_slots[i].is_frozen:
                 food = f()
                 food.assign_shop(self)
                 self._food_slots[i] = ShopItem(food, False)
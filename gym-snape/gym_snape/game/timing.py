@@ -0,0 +1,133 @@
+"""
+Opt-in wall-clock timing of the phases of a game.
+
+Timing is enabled per object by `PhaseTimer.instrument`, which shadows the
+timed methods with wrappers in the instance's `__dict__`. Objects that are not
+instrumented run the plain class methods, so timing costs nothing when it is
+not in use. The wrappers cannot be pickled: classes whose instrumented objects
+get pickled or copied leave them out of their state (see `untimed_state`), so
+copies are not timed.
+"""
+
+__all__ = ['PhaseTimer', 'GAME_PHASES', 'untimed_state']
+
+# Standard library imports
+from functools import wraps
+import time
+from typing import Dict, Iterable, Mapping, Tuple
+import weakref
+
+# The methods of `Game` that make up each phase. Phases may nest: the battle
+# phases and shop actions include the abilities they cast, and `challenge`
+# rolls the shop once the battle is over.
+GAME_PHASES: Dict[str, Tuple[str, ...]] = {
+    'shop_action': ('freeze', 'buy', 'sell', 'swap', 'merge'),
+    'roll': ('roll',),
+    'battle_setup': ('_battle_setup',),
+    'battle_rounds': ('_battle_rounds',),
+    'ability_casting': ('cast_all_abilities',),
+    'cleanup': ('_battle_cleanup',),
+}
+
+
+def untimed_state(obj) -> dict:
+    """
+    Returns the attributes of an object without the wrappers installed by
+    `PhaseTimer.instrument`, e.g., as the state to pickle it with.
+    """
+    return dict((name, value) for name, value in obj.__dict__.items()
+                if not hasattr(value, '_timed_phase'))
+
+
+class PhaseTimer:
+    """
+    Accumulates the wall-clock time and number of calls of named phases.
+
+    Times are recorded both cumulatively and since the last call to `lap`, so
+    a caller can report the cost of a single step as well as of a whole run.
+    The timer holds no reference to the objects it instruments.
+    """
+
+    def __init__(self):
+        self._totals: Dict[str, list] = {}
+        self._lap: Dict[str, list] = {}
+
+    def instrument(self, obj, phases: Mapping[str, Iterable[str]]):
+        """
+        Times the given methods of an object from now on.
+
+        Parameters
+        ----------
+        obj: object
+            The instance whose methods should be timed.
+
+        phases: Mapping[str, Iterable[str]]
+            Phase names mapped to the names of the methods that make up that
+            phase (e.g., `GAME_PHASES`).
+        """
+        for phase, names in phases.items():
+            self._totals.setdefault(phase, [0.0, 0])
+            for name in names:
+                self._wrap(obj, name, phase)
+
+    def record(self, phase: str, seconds: float):
+        """Adds one call of the given duration to the phase."""
+        for table in (self._totals, self._lap):
+            entry = table.get(phase)
+            if entry is None:
+                table[phase] = [seconds, 1]
+            else:
+                entry[0] += seconds
+                entry[1] += 1
+
+    def lap(self) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the time and calls per phase since the previous lap, then
+        starts a new lap.
+        """
+        lap = self._lap
+        self._lap = {}
+        return dict((phase, {'seconds': seconds, 'calls': calls})
+                    for phase, (seconds, calls) in lap.items())
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Returns the cumulative time, calls, and mean time per phase."""
+        return dict(
+            (phase, {'seconds': seconds, 'calls': calls,
+                     'mean': seconds / calls if calls else 0.0})
+            for phase, (seconds, calls) in self._totals.items()
+        )
+
+    def reset(self):
+        """Discards all recorded times."""
+        for phase in self._totals:
+            self._totals[phase] = [0.0, 0]
+        self._lap = {}
+
+    def __str__(self):
+        lines = [f'{"phase":<16} {"calls":>10} {"total (s)":>12} '
+                 f'{"mean (us)":>12}']
+        for phase, entry in self.report().items():
+            lines.append(f'{phase:<16} {entry["calls"]:>10} '
+                         f'{entry["seconds"]:>12.4f} '
+                         f'{entry["mean"] * 1e6:>12.1f}')
+        return '\n'.join(lines)
+
+    def _wrap(self, obj, name: str, phase: str):
+        """Shadows `obj.name` with a wrapper that times each call."""
+        method = getattr(type(obj), name)
+        # The wrapper is stored on the object, so it only refers back to the
+        # object weakly to avoid creating a reference cycle
+        ref = weakref.ref(obj)
+        record = self.record
+        perf_counter = time.perf_counter
+
+        @wraps(method)
+        def _impl(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return method(ref(), *args, **kwargs)
+            finally:
+                record(phase, perf_counter() - start)
+        _impl._timed_phase = phase
+        obj.__dict__[name] = _impl
@@ -1,6 +1,7 @@
 # Standard library imports
 from collections import namedtuple
 from enum import IntEnum
+import weakref
 
 
 class MatchResult(IntEnum):
@@ -10,3 +11,48 @@ class MatchResult(IntEnum):
 
 
 RollRate = namedtuple('RollRate', ['item', 'rate'])
+
+
+class _Ref(weakref.ref):
+    """
+    A weak reference that pickles its referent along with it. Like
+    `weakref.ref`, it is shared rather than copied by `copy.deepcopy`.
+    """
+
+    __slots__ = ()
+
+    def __reduce__(self):
+        return (_make_ref, (self(),))
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def _make_ref(obj) -> '_Ref':
+    """Returns a weak reference to the object, or None for no object."""
+    return None if obj is None else _Ref(obj)
+
+
+class WeakAttribute:
+    """
+    A descriptor for attributes that hold a back-reference to an owner object
+    (e.g., a pet's game or deck).
+
+    Only a weak reference to the assigned object is stored, so back-references
+    do not create reference cycles and discarded games are freed by reference
+    counting alone. Reading the attribute returns the referenced object, or
+    None if nothing was assigned or the object no longer exists. Objects with
+    back-references can be pickled along with their owners.
+    """
+
+    def __set_name__(self, owner, name):
+        self._ref_name = name + '_ref'
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        ref = instance.__dict__.get(self._ref_name)
+        return None if ref is None else ref()
+
+    def __set__(self, instance, value):
+        instance.__dict__[self._ref_name] = _make_ref(value)
@@ -0,0 +1,357 @@
+"""
+A lobby environment in which many players shop simultaneously and are paired
+up to battle each other every round.
+
+Each step takes one action per seat. Like `SnapeDuel`, ending the turn only
+marks a player as ready; once every player still in the game is ready, the
+players are paired up (randomly or Swiss-style) and all battles of the round
+are resolved at once. With an odd number of players left, one of them battles
+a copy of another player's deck instead.
+
+By default, battles are fought in the lobby process. A battle takes less time
+than pickling the two games to another process, so worker processes (see
+`n_workers`) only pay off when battles are long, e.g., in large lobbies of
+late-game decks; time a run both ways before enabling them. Only the battles
+themselves are run in the workers. The turn end and battle end abilities
+change the players' decks for good, so they are called in the lobby process;
+the games are pickled to the workers, and only the results are shipped back.
+
+Example
+----------
+>>> env = SnapeLobby(n_players=8, pairing='swiss')
+>>> agent = BatchMaskedRandom(env.players[0])
+>>> obs = env.reset(seed=0)
+>>> done = False
+>>> while not done:
+...     actions = agent.select_actions(obs, env.action_masks())
+...     obs, rewards, done, info = env.step(actions)
+>>> env.close()
+"""
+
+__all__ = ['SnapeLobby', 'simulate_battle', 'PAIRINGS']
+
+# Standard library imports
+from copy import deepcopy
+from multiprocessing import Pool
+import os
+from typing import List, Optional, Tuple
+
+# Local application imports
+from gym_snape.env import Snape
+from gym_snape.game import Game
+from gym_snape.game.utils import MatchResult
+
+# Third party imports
+import gym
+from gym import spaces
+import numpy as np
+
+PAIRINGS = ('random', 'swiss')
+
+
+def simulate_battle(task: Tuple[Game, Game, int]) -> Tuple[int, ...]:
+    """
+    Fights a battle between two games whose turn end abilities have already
+    been called, and restores their decks afterwards.
+
+    Parameters
+    ----------
+    task: Tuple[Game, Game, int]
+        The two games, and the seed for the abilities' random draws.
+
+    Returns
+    ----------
+    The result of the battle for the first game (see `MatchResult`), the
+    number of rounds fought, and whether the battle ended in a stalemate or
+    at the round cap.
+    """
+    game, other, seed = task
+    n_stalemates = game._n_stalemates
+    n_round_caps = game._n_round_caps
+
+    # Abilities draw from NumPy's global generator; reseed it for this battle
+    # alone, so the result does not depend on which process fights it
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        game._battle_start(other)
+        result = game._battle_rounds(other)
+    finally:
+        np.random.set_state(state)
+    game.deck.battle_cleanup()
+    other.deck.battle_cleanup()
+    return (int(result), game._n_battle_rounds,
+            game._n_stalemates - n_stalemates,
+            game._n_round_caps - n_round_caps)
+
+
+class SnapeLobby(gym.Env):
+    """
+    N players, each with their own game, who shop simultaneously and are
+    paired up to battle once all of them have ended their turn.
+
+    A player is out once they have lost all their lives. The lobby is over
+    once a player has won, or at most one player is left.
+
+    Parameters
+    ----------
+    n_players: int
+        The number of seats in the lobby. Default is 8.
+
+    pairing: str
+        How players are paired up each round: 'random' (default), or 'swiss',
+        which pairs players with similar records (trophies, then lives).
+
+    n_workers: int | None
+        The number of worker processes that battles are fought in. If 0
+        (default), battles are fought in this process, which is the fastest
+        unless battles are long (see the module docstring). If None, there is
+        one worker per battle of a full round, up to the number of CPUs. The
+        workers are started on the first round of battles.
+
+    obs_mode: str
+        The observation mode of the players (see `Snape`). Default is 'flat',
+        in which case observations are stacked into an array of shape
+        (n_players, FLAT_OBS_SIZE); in 'dict' mode, they are a tuple of dicts.
+
+    Attributes
+    ----------
+    players: List[Snape]
+        The environments of the players. Agents that need an environment
+        should be given these, but they must not be stepped directly.
+    """
+    metadata = {'render.modes': ['ansi']}
+
+    def __init__(self, n_players: int = 8, pairing: str = 'random',
+                 n_workers: Optional[int] = 0, obs_mode: str = 'flat'):
+        super().__init__()
+        if type(n_players) != int:
+            raise TypeError('n_players must be an integer value')
+        if n_players < 2:
+            raise ValueError('a lobby needs at least 2 players')
+        if pairing not in PAIRINGS:
+            raise ValueError(f'pairing must be one of {PAIRINGS}')
+        self.n_players = n_players
+        self.pairing = pairing
+        self.obs_mode = obs_mode
+
+        self.players: List[Snape] = [
+            Snape(obs_mode=obs_mode) for _ in range(n_players)]
+        self.end_turn_action = self.players[0].end_turn_action
+        self._ready = np.zeros(n_players, dtype=bool)
+        self._rng = np.random.default_rng()
+
+        if n_workers is None:
+            n_workers = min(n_players // 2, os.cpu_count())
+        self.n_workers = n_workers
+        self._pool = None
+
+        n_actions = self.players[0].action_space.n
+        self.action_space = spaces.MultiDiscrete([n_actions] * n_players)
+        if obs_mode == 'flat':
+            space = self.players[0].observation_space
+            self.observation_space = spaces.Box(
+                low=np.stack([space.low] * n_players),
+                high=np.stack([space.high] * n_players),
+                dtype=space.dtype
+            )
+        else:
+            self.observation_space = spaces.Tuple(
+                [player.observation_space for player in self.players])
+
+    @property
+    def out(self) -> np.ndarray:
+        """Whether each player's game is over, as a boolean array."""
+        return np.array([player.game.game_over for player in self.players])
+
+    @property
+    def ready(self) -> np.ndarray:
+        """Whether each player has ended their turn, as a boolean array."""
+        return self._ready.copy()
+
+    def action_masks(self) -> np.ndarray:
+        """
+        Returns the legal actions of all players as a boolean array of shape
+        (n_players, number of actions). A player who is waiting to battle or
+        out of the game may only end their turn.
+        """
+        n_actions = self.players[0].action_space.n
+        masks = np.zeros((self.n_players, n_actions), dtype=bool)
+        for i, player in enumerate(self.players):
+            if self._ready[i] or player.game.game_over:
+                masks[i, self.end_turn_action] = True
+            else:
+                masks[i] = player.action_mask()
+        return masks
+
+    def step(self, actions):
+        """
+        Parameters
+        ----------
+        actions: array_like
+            One action per seat. The actions of players who are waiting to
+            battle or out of the game are ignored.
+
+        Returns
+        ----------
+        The observations of all players, a (n_players,) array of their
+        rewards, the done flag, and a dict of diagnostic information.
+        Players get -1 for each action taken, and +100 or -100 on the step
+        their game is won or lost. `info['success']` flags, per player,
+        whether their action had its intended effect, and `info['out']`
+        which players are out. On the step a round of battles was fought,
+        `info['pairs']` holds the pairs of seats that battled (a seat paired
+        with -1 battled a copy of another player's deck) and
+        `info['results']` the result for the first seat of each pair.
+        """
+        actions = np.asarray(actions)
+        assert self.action_space.contains(actions), \
+            f'Actions {actions} are invalid; action space is {self.action_space}'
+
+        was_out = self.out
+        rewards = np.zeros(self.n_players, dtype=np.float32)
+        success = np.zeros(self.n_players, dtype=bool)
+        for i, player in enumerate(self.players):
+            if self._ready[i] or was_out[i]:
+                continue
+
+            # Small negative reward for each action taken
+            rewards[i] = -1
+            if actions[i] == self.end_turn_action:
+                self._ready[i] = True
+                success[i] = True
+            else:
+                success[i] = player._apply_action(int(actions[i]))
+
+        # Fight a round of battles once every player left is ready
+        info = {}
+        if np.all(self._ready | was_out):
+            pairs = self._pair(np.flatnonzero(~was_out))
+            info['pairs'] = pairs
+            info['results'] = self._fight(pairs)
+            self._ready[:] = False
+
+        # Extra reward for game won or lost
+        out = self.out
+        for i in np.flatnonzero(out & ~was_out):
+            rewards[i] = 100 if self.players[i].game.won else -100
+
+        # Check for end-of-lobby
+        won = any(player.game.won for player in self.players)
+        done = won or bool(np.count_nonzero(~out) <= 1)
+
+        info['success'] = success
+        info['out'] = out
+
+        return self._get_obs(), rewards, done, info
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Resets all games in place and returns their initial observations.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the shop of seat i is reseeded with `seed + i`, and the
+            pairing and battles are seeded with `seed` as well.
+        """
+        self._ready[:] = False
+        if seed is not None:
+            self._rng = np.random.default_rng(seed)
+        for i, player in enumerate(self.players):
+            player.reset(None if seed is None else seed + i)
+        return self._get_obs()
+
+    def _get_obs(self):
+        observations = [player._get_obs() for player in self.players]
+        if self.obs_mode == 'flat':
+            return np.stack(observations)
+        return tuple(observations)
+
+    def _pair(self, seats: np.ndarray) -> np.ndarray:
+        """
+        Pairs up the given seats and returns the pairs as an array of shape
+        (number of pairs, 2). With an odd number of seats, the last one is
+        paired with -1.
+        """
+        if self.pairing == 'swiss':
+            # Sort by trophies, then lives, breaking ties randomly
+            trophies = [self.players[i].game.trophies for i in seats]
+            lives = [self.players[i].game.lives for i in seats]
+            ties = self._rng.random(len(seats))
+            seats = seats[np.lexsort((ties, lives, trophies))[::-1]]
+        else:
+            seats = self._rng.permutation(seats)
+
+        if len(seats) % 2 == 1:
+            seats = np.append(seats, -1)
+        return seats.reshape(-1, 2)
+
+    def _fight(self, pairs: np.ndarray) -> np.ndarray:
+        """Fights the battles between the given pairs of seats, and returns
+        the result for the first seat of each pair."""
+        matches = []
+        for i, j in pairs:
+            game = self.players[i].game
+            if j >= 0:
+                other = self.players[j].game
+            else:
+                # Battle a copy of a random other player's deck
+                seats = pairs[pairs >= 0]
+                source = self._rng.choice(seats[seats != i])
+                other = deepcopy(self.players[source].game)
+            matches.append((game, other))
+
+        # Turn end abilities change the decks for good, so they are called here
+        for game, other in matches:
+            game._turn_end(other)
+
+        seeds = self._rng.integers(2**32, size=len(matches))
+        tasks = [(game, other, int(seed))
+                 for (game, other), seed in zip(matches, seeds)]
+        if self.n_workers > 0:
+            if self._pool is None:
+                self._pool = Pool(self.n_workers)
+            # The enemies of the last battle would be pickled along
+            for game, other in matches:
+                for pet in list(game.deck) + list(other.deck):
+                    if pet:
+                        pet.assign_enemies(None)
+            outcomes = self._pool.map(simulate_battle, tasks)
+        else:
+            outcomes = list(map(simulate_battle, tasks))
+
+        results = np.zeros(len(matches), dtype=np.int8)
+        for k, ((game, other), outcome) in enumerate(zip(matches, outcomes)):
+            result, n_rounds, n_stalemates, n_round_caps = outcome
+            if self.n_workers > 0:
+                # Battles fought in this process updated the games themselves
+                for g in (game, other):
+                    g._n_battle_rounds = n_rounds
+                    g._n_stalemates += n_stalemates
+                    g._n_round_caps += n_round_caps
+            game._battle_end(other, MatchResult(result))
+            results[k] = result
+
+        for (i, j), (game, other) in zip(pairs, matches):
+            game._new_turn()
+            if j >= 0:
+                other._new_turn()
+
+        return results
+
+    def render(self, mode='ansi'):
+        if mode == 'ansi':
+            for i, player in enumerate(self.players):
+                print(f'PLAYER {i + 1}')
+                player.render(mode)
+        else:
+            super().render(mode=mode)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        for player in self.players:
+            player.close()
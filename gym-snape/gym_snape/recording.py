@@ -0,0 +1,276 @@
+"""
+Records trajectories of a `Snape` environment to disk, and reads them back.
+
+`TrajectoryRecorder` wraps an environment and logs every transition (the flat
+observation the action was chosen from, optionally its legal action mask, the
+action, the reward, and the done flag) into preallocated arrays. Once `shard_size`
+transitions have been collected, the arrays are handed to a background thread
+that writes them out as a shard, while the actor keeps stepping into a second
+set of arrays. Each finished shard is appended to `manifest.jsonl`, so readers
+can stream shards while they are still being recorded.
+
+`TrajectoryReader` lists the shards in the manifest and loads them; shards of
+raw `.npy` files are memory-mapped rather than read into memory.
+
+Example
+----------
+>>> env = TrajectoryRecorder(Snape(obs_mode='flat'), 'trajectories',
+...                          shard_size=100_000, record_masks=True)
+>>> obs = env.reset()
+>>> obs, reward, done, info = env.step(action)
+>>> env.close()
+>>> for shard in TrajectoryReader('trajectories'):
+...     shard['obs'], shard['action'], shard['mask']
+"""
+
+__all__ = ['TrajectoryRecorder', 'TrajectoryReader', 'TRAJECTORY_FIELDS']
+
+# Standard library imports
+import json
+import os
+from queue import Queue
+from threading import Thread
+from typing import Dict, Iterator, List, Optional
+
+# Local application imports
+from gym_snape.env import FLAT_OBS_SIZE, Snape
+
+# Third party imports
+import gym
+import numpy as np
+
+# Fields of a transition: their dtypes and their shapes (besides the leading
+# transition axis). A shape of None stands for the number of actions.
+TRAJECTORY_FIELDS = {
+    'obs': (np.int32, (FLAT_OBS_SIZE,)),
+    'mask': (np.bool_, (None,)),
+    'action': (np.int32, ()),
+    'reward': (np.float32, ()),
+    'done': (np.bool_, ()),
+}
+
+_MANIFEST = 'manifest.jsonl'
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    """
+    Logs the transitions of the wrapped environment to shards on disk.
+
+    Parameters
+    ----------
+    env: Snape
+        The environment to record. Its observations may be of any mode; the
+        flat observation is recorded regardless. The observation of a
+        transition is the one returned by the previous `reset` or `step`,
+        i.e., the one the action was chosen from. In flat mode, it is reused
+        as is; in other modes, the flat observation is encoded as well.
+
+    directory: str
+        Where to write the shards and the manifest. Created if it does not
+        exist. Recording into a directory that already holds shards appends
+        new shards after the existing ones.
+
+    shard_size: int
+        The number of transitions per shard. The last shard, written by
+        `flush` or `close`, may be shorter.
+
+    compress: bool
+        If True, shards are written as compressed `.npz` files. If False
+        (default), each field of a shard is written as a raw `.npy` file,
+        which can be memory-mapped by the reader.
+
+    record_masks: bool
+        If True, the legal action mask (see `Snape.action_mask`) is computed
+        right before every action and recorded. Default is False, since
+        computing the mask costs more than the rest of a step.
+    """
+
+    def __init__(self, env: Snape, directory: str, shard_size: int = 65_536,
+                 compress: bool = False, record_masks: bool = False):
+        super().__init__(env)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self.compress = compress
+        self.record_masks = record_masks
+
+        self._snape = env.unwrapped
+        self._obs = self._snape._get_flat_obs()
+        self._n_shards = len(TrajectoryReader(directory).manifest)
+        self._n_actions = self._snape.action_space.n
+
+        # Two sets of buffers: one is filled by the actor while the other may
+        # be written out by the writer thread
+        self._free = Queue()
+        for _ in range(2):
+            self._free.put(self._allocate())
+        self._buffers = self._free.get()
+        self._n = 0
+
+        self._jobs = Queue()
+        self._error = None
+        self._writer = Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        self._obs = self._flat_obs(obs)
+        return obs
+
+    def step(self, action):
+        n = self._n
+        buffers = self._buffers
+        buffers['obs'][n] = self._obs
+        if self.record_masks:
+            buffers['mask'][n] = self._snape.action_mask()
+
+        obs, reward, done, info = self.env.step(action)
+        self._obs = self._flat_obs(obs)
+
+        buffers['action'][n] = action
+        buffers['reward'][n] = reward
+        buffers['done'][n] = done
+        self._n = n + 1
+        if self._n == self.shard_size:
+            self._submit()
+
+        return obs, reward, done, info
+
+    def flush(self):
+        """Writes out the transitions collected so far and waits for all
+        pending shards to be written."""
+        if self._n > 0:
+            self._submit()
+        self._jobs.join()
+        self._raise_error()
+
+    def close(self):
+        if self._writer.is_alive():
+            self.flush()
+            self._jobs.put(None)
+            self._writer.join()
+        super().close()
+
+    def _flat_obs(self, obs) -> np.ndarray:
+        """Returns the flat form of an observation returned by the
+        environment."""
+        if self._snape.obs_mode == 'flat':
+            return obs
+        return self._snape._get_flat_obs()
+
+    def _allocate(self) -> Dict[str, np.ndarray]:
+        buffers = {}
+        for name, (dtype, shape) in TRAJECTORY_FIELDS.items():
+            if name == 'mask' and not self.record_masks:
+                continue
+            shape = tuple(self._n_actions if d is None else d for d in shape)
+            buffers[name] = np.zeros((self.shard_size,) + shape, dtype=dtype)
+        return buffers
+
+    def _submit(self):
+        """Hands the current buffers to the writer and takes free ones."""
+        self._raise_error()
+        name = f'shard_{self._n_shards:06d}'
+        self._jobs.put((name, self._buffers, self._n))
+        self._n_shards += 1
+        self._buffers = self._free.get()
+        self._n = 0
+
+    def _write_loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                self._jobs.task_done()
+                return
+            name, buffers, n = job
+            try:
+                if self._error is None:
+                    self._write_shard(name, buffers, n)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._free.put(buffers)
+                self._jobs.task_done()
+
+    def _write_shard(self, name: str, buffers: Dict[str, np.ndarray], n: int):
+        if self.compress:
+            path = name + '.npz'
+            tmp = os.path.join(self.directory, name + '.tmp.npz')
+            np.savez_compressed(
+                tmp, **dict((k, v[:n]) for k, v in buffers.items()))
+        else:
+            path = name
+            tmp = os.path.join(self.directory, name + '.tmp')
+            os.makedirs(tmp)
+            for k, v in buffers.items():
+                np.save(os.path.join(tmp, k + '.npy'), v[:n])
+        os.replace(tmp, os.path.join(self.directory, path))
+
+        # Only list the shard once it is complete
+        entry = {'path': path, 'n': n, 'compressed': self.compress,
+                 'fields': list(buffers.keys())}
+        with open(os.path.join(self.directory, _MANIFEST), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError('failed to write a shard') from self._error
+
+
+class TrajectoryReader:
+    """
+    Reads the shards written by `TrajectoryRecorder`.
+
+    Parameters
+    ----------
+    directory: str
+        The directory the recorder wrote to.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.manifest: List[dict] = []
+        self.refresh()
+
+    def refresh(self):
+        """Picks up shards that were completed since the last refresh."""
+        path = os.path.join(self.directory, _MANIFEST)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            lines = f.readlines()
+        # A line without its newline may still be being written
+        self.manifest = [json.loads(line) for line in lines
+                         if line.endswith('\n')]
+
+    def __len__(self) -> int:
+        """Returns the total number of transitions in the listed shards."""
+        return sum(entry['n'] for entry in self.manifest)
+
+    def __iter__(self) -> Iterator[Dict[str, np.ndarray]]:
+        for i in range(len(self.manifest)):
+            yield self.load(i)
+
+    def load(self, index: int,
+             mmap_mode: Optional[str] = 'r') -> Dict[str, np.ndarray]:
+        """
+        Returns the fields of the shard at the given position in the manifest.
+
+        Parameters
+        ----------
+        index: int
+            The position of the shard in the manifest.
+
+        mmap_mode: str | None
+            How raw `.npy` shards are memory-mapped (see `np.load`). Default
+            is 'r' (read-only). Compressed shards are always read into memory.
+        """
+        entry = self.manifest[index]
+        path = os.path.join(self.directory, entry['path'])
+        if entry['compressed']:
+            with np.load(path) as data:
+                return dict((k, data[k]) for k in entry['fields'])
+        return dict(
+            (k, np.load(os.path.join(path, k + '.npy'), mmap_mode=mmap_mode))
+            for k in entry['fields']
+        )
@@ -0,0 +1,417 @@
+"""
+A replay buffer of `Snape` transitions, stored in memory-mapped files.
+
+Every actor process appends to its own shard through a `ReplayWriter`: a set of
+fixed-capacity `.npy` files, one per field, that are filled as a ring buffer.
+Since no two processes write to the same file, any number of actors can write
+concurrently without locks. Learners sample from all shards through a
+`ReplaySampler`, either uniformly or in proportion to priorities kept in a sum
+tree. All arrays live in memory-mapped files, so the buffer can be far larger
+than RAM; memory use depends only on the batch size and the pages the OS
+decides to cache.
+
+Observations use the flat layout of `gym_snape.env` (see `FLAT_OBS_SIZE`).
+Transitions are appended in order, so the next observation of a transition is
+the observation of the following row; a transition marked done is the last of
+its episode (whether it ended or was cut short), and its next observation is
+meaningless.
+
+Example
+----------
+>>> writer = ReplayWriter('replay', capacity=10_000_000)  # in each actor
+>>> writer.add(obs, action, reward, done)
+>>> sampler = ReplaySampler('replay', prioritized=True)  # in the learner
+>>> batch = sampler.sample(256)
+>>> sampler.update_priorities(batch['indices'], td_errors)
+"""
+
+__all__ = ['ReplayWriter', 'ReplaySampler', 'SumTree', 'REPLAY_FIELDS']
+
+# Standard library imports
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+# Local application imports
+from gym_snape.env import FLAT_OBS_SIZE
+
+# Third party imports
+import numpy as np
+
+# Fields of a transition: their dtypes and their shapes (besides the leading
+# transition axis)
+REPLAY_FIELDS = {
+    'obs': (np.dtype('<i4'), (FLAT_OBS_SIZE,)),
+    'action': (np.dtype('<i4'), ()),
+    'reward': (np.dtype('<f4'), ()),
+    'done': (np.dtype('?'), ()),
+}
+
+# Indices returned by `ReplaySampler.sample` combine the shard and the row
+_ROW_BITS = 40
+
+
+class ReplayWriter:
+    """
+    Appends transitions to a shard of a replay buffer.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the replay buffer. Created if it does not exist.
+
+    capacity: int
+        The number of transitions the shard holds. Once full, the oldest
+        transitions are overwritten. The files are created sparse, so disk
+        space is only used as the shard fills up.
+
+    writer_id: str | None
+        Names the shard; must be unique among the writers of the buffer.
+        Default is the process ID. Reopening an existing shard continues
+        where it left off.
+    """
+
+    def __init__(self, directory: str, capacity: int,
+                 writer_id: Optional[str] = None):
+        os.makedirs(directory, exist_ok=True)
+        if writer_id is None:
+            writer_id = str(os.getpid())
+        self.capacity = capacity
+        prefix = os.path.join(directory, f'writer_{writer_id}')
+        meta_path = prefix + '.json'
+
+        mode = 'r+' if os.path.exists(meta_path) else 'w+'
+        self._arrays = {}
+        for name, (dtype, shape) in REPLAY_FIELDS.items():
+            self._arrays[name] = np.lib.format.open_memmap(
+                f'{prefix}_{name}.npy', mode=mode, dtype=dtype,
+                shape=(capacity,) + shape)
+        self._count = np.lib.format.open_memmap(
+            prefix + '_count.npy', mode=mode, dtype='<i8', shape=(1,))
+
+        # Announce the shard only once all of its files exist
+        if mode == 'w+':
+            tmp = meta_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump({'writer_id': writer_id, 'capacity': capacity}, f)
+            os.replace(tmp, meta_path)
+
+    def __len__(self) -> int:
+        """Returns the number of transitions held (at most the capacity)."""
+        return min(int(self._count[0]), self.capacity)
+
+    def add(self, obs: np.ndarray, action: int, reward: float, done: bool):
+        """
+        Appends one transition.
+
+        Parameters
+        ----------
+        obs: np.ndarray
+            The flat observation the action was taken from.
+
+        action: int
+            The action taken.
+
+        reward: float
+            The reward received for the action.
+
+        done: bool
+            True if this is the last transition of its episode.
+        """
+        count = int(self._count[0])
+        row = count % self.capacity
+        self._arrays['obs'][row] = obs
+        self._arrays['action'][row] = action
+        self._arrays['reward'][row] = reward
+        self._arrays['done'][row] = done
+        # Publish the row only after it has been written
+        self._count[0] = count + 1
+
+    def add_batch(self, obs: np.ndarray, action: np.ndarray,
+                  reward: np.ndarray, done: np.ndarray):
+        """Appends consecutive transitions; see `add` for the parameters."""
+        count = int(self._count[0])
+        rows = (count + np.arange(len(action))) % self.capacity
+        self._arrays['obs'][rows] = obs
+        self._arrays['action'][rows] = action
+        self._arrays['reward'][rows] = reward
+        self._arrays['done'][rows] = done
+        self._count[0] = count + len(action)
+
+    def flush(self):
+        """Writes the shard's dirty pages back to disk."""
+        for array in self._arrays.values():
+            array.flush()
+        self._count.flush()
+
+
+class SumTree:
+    """
+    A binary tree whose leaves hold non-negative priorities and whose inner
+    nodes hold the sum of their children, for sampling leaves in proportion
+    to their priority in logarithmic time.
+
+    Parameters
+    ----------
+    capacity: int
+        The number of leaves.
+
+    path: str | None
+        If given, the tree is kept in a memory-mapped file at this path.
+    """
+
+    def __init__(self, capacity: int, path: Optional[str] = None):
+        self.capacity = capacity
+        self._size = 1 << max(0, int(capacity - 1).bit_length())
+        shape = (2 * self._size,)
+        if path is None:
+            self._tree = np.zeros(shape, dtype=np.float64)
+        else:
+            self._tree = np.lib.format.open_memmap(
+                path, mode='w+', dtype=np.float64, shape=shape)
+
+    @property
+    def total(self) -> float:
+        return float(self._tree[1])
+
+    def __getitem__(self, leaves) -> np.ndarray:
+        return self._tree[np.asarray(leaves) + self._size]
+
+    def update(self, leaves: np.ndarray, priorities: np.ndarray):
+        """Sets the priorities of the given leaves."""
+        nodes = np.asarray(leaves, dtype=np.int64) + self._size
+        if len(nodes) == 0:
+            return
+        self._tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] > 0:
+            self._tree[nodes] = self._tree[2 * nodes] + self._tree[2*nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """Returns `n` leaves drawn in proportion to their priorities."""
+        values = rng.random(n) * self.total
+        nodes = np.ones(n, dtype=np.int64)
+        while nodes[0] < self._size:
+            left = self._tree[2 * nodes]
+            go_right = values >= left
+            values -= left * go_right
+            nodes = 2*nodes + go_right
+        # Guard against rounding errors leading into empty leaves
+        return np.minimum(nodes - self._size, self.capacity - 1)
+
+
+class _Shard:
+    """A read-only view of one writer's shard."""
+
+    def __init__(self, directory: str, writer_id: str, capacity: int):
+        prefix = os.path.join(directory, f'writer_{writer_id}')
+        self.writer_id = writer_id
+        self.capacity = capacity
+        self.arrays = dict(
+            (name, np.load(f'{prefix}_{name}.npy', mmap_mode='r'))
+            for name in REPLAY_FIELDS
+        )
+        self._count = np.load(prefix + '_count.npy', mmap_mode='r')
+
+    def count(self) -> int:
+        return int(self._count[0])
+
+
+class ReplaySampler:
+    """
+    Samples batches of transitions from all shards of a replay buffer.
+
+    Parameters
+    ----------
+    directory: str
+        The directory of the replay buffer.
+
+    prioritized: bool
+        If True, transitions are sampled in proportion to their priority
+        raised to the power `alpha`; new transitions get the highest priority
+        seen so far. If False (default), transitions are sampled uniformly.
+
+    alpha: float
+        How strongly priorities skew sampling (0 is uniform).
+
+    margin: int
+        The number of oldest transitions of a full shard that are never
+        sampled, because a writer may be about to overwrite them.
+
+    tree_directory: str | None
+        Where the sum trees of prioritized sampling are kept as memory-mapped
+        files. Default is a new temporary directory.
+
+    seed: int | None
+        Seed for the random number generator.
+    """
+
+    def __init__(self, directory: str, prioritized: bool = False,
+                 alpha: float = 0.6, margin: int = 1024,
+                 tree_directory: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.directory = directory
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.margin = margin
+        if prioritized and tree_directory is None:
+            tree_directory = tempfile.mkdtemp(prefix='snape_replay_')
+        self.tree_directory = tree_directory
+        self.rng = np.random.default_rng(seed)
+
+        self._shards: List[_Shard] = []
+        self._trees: List[SumTree] = []
+        self._seen: List[int] = []
+        self._max_priority = 1.0
+        self.refresh()
+
+    def refresh(self):
+        """Picks up new shards and the transitions appended since the last
+        refresh."""
+        known = set(shard.writer_id for shard in self._shards)
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith('writer_') and name.endswith('.json')):
+                continue
+            with open(os.path.join(self.directory, name)) as f:
+                meta = json.load(f)
+            if meta['writer_id'] in known:
+                continue
+            self._shards.append(
+                _Shard(self.directory, meta['writer_id'], meta['capacity']))
+            self._seen.append(0)
+            if self.prioritized:
+                path = os.path.join(self.tree_directory,
+                                    f'writer_{meta["writer_id"]}.tree.npy')
+                self._trees.append(SumTree(meta['capacity'], path))
+
+        if self.prioritized:
+            for i, shard in enumerate(self._shards):
+                self._refresh_priorities(i, shard.count())
+
+    def _bounds(self, count: int, capacity: int):
+        """Returns the first and last (exclusive) logical positions that can
+        be sampled from a shard that has had `count` rows written."""
+        # The newest row has no next observation yet
+        stop = count - 1
+        start = 0
+        if count > capacity:
+            start = count - capacity + self.margin
+        return start, max(start, stop)
+
+    def _refresh_priorities(self, i: int, count: int):
+        shard, tree = self._shards[i], self._trees[i]
+        start, stop = self._bounds(count, shard.capacity)
+        seen = max(self._seen[i], start)
+        if stop > seen:
+            rows = np.arange(seen, stop) % shard.capacity
+            priority = self._max_priority ** self.alpha
+            tree.update(rows, np.full(len(rows), priority))
+        # Rows about to be overwritten must not be sampled
+        if count > shard.capacity:
+            old = np.arange(count - shard.capacity, start) % shard.capacity
+            if len(old):
+                tree.update(old, np.zeros(len(old)))
+        newest = (count - 1) % shard.capacity
+        if count > 0:
+            tree.update([newest], [0.0])
+        self._seen[i] = stop
+
+    def __len__(self) -> int:
+        """Returns the number of transitions that can be sampled."""
+        return sum(stop - start for start, stop in
+                   (self._bounds(s.count(), s.capacity)
+                    for s in self._shards))
+
+    def sample(self, batch_size: int, beta: float = 0.4) -> Dict:
+        """
+        Samples a batch of transitions.
+
+        Parameters
+        ----------
+        batch_size: int
+            The number of transitions.
+
+        beta: float
+            For prioritized sampling, the exponent of the importance sampling
+            weights (1 fully corrects for the non-uniform sampling).
+
+        Returns
+        ----------
+        A dict with the fields of `REPLAY_FIELDS`, the next observations
+        ('next_obs'), indices for `update_priorities` ('indices'), and
+        importance sampling weights ('weights', all ones when sampling
+        uniformly).
+        """
+        if self.prioritized:
+            weights = np.array([tree.total for tree in self._trees])
+        else:
+            bounds = [self._bounds(s.count(), s.capacity)
+                      for s in self._shards]
+            weights = np.array([stop - start for start, stop in bounds],
+                               dtype=np.float64)
+        if len(weights) == 0 or weights.sum() <= 0:
+            raise ValueError('the replay buffer has nothing to sample')
+        per_shard = self.rng.multinomial(batch_size, weights / weights.sum())
+
+        parts = []
+        for i, n in enumerate(per_shard):
+            if n == 0:
+                continue
+            shard = self._shards[i]
+            if self.prioritized:
+                rows = self._trees[i].sample(n, self.rng)
+            else:
+                start, stop = bounds[i]
+                rows = self.rng.integers(start, stop, size=n) % shard.capacity
+            parts.append((i, np.sort(rows)))
+
+        batch = dict((name, []) for name in REPLAY_FIELDS)
+        batch['next_obs'] = []
+        indices, probs = [], []
+        if self.prioritized:
+            total = sum(tree.total for tree in self._trees)
+        for i, rows in parts:
+            shard = self._shards[i]
+            for name in REPLAY_FIELDS:
+                batch[name].append(shard.arrays[name][rows])
+            next_rows = (rows + 1) % shard.capacity
+            batch['next_obs'].append(shard.arrays['obs'][next_rows])
+            indices.append((i << _ROW_BITS) + rows)
+            if self.prioritized:
+                probs.append(self._trees[i][rows] / total)
+
+        batch = dict((k, np.concatenate(v)) for k, v in batch.items())
+        batch['indices'] = np.concatenate(indices)
+        if self.prioritized:
+            weights = (len(self) * np.concatenate(probs)) ** -beta
+            batch['weights'] = (weights / weights.max()).astype(np.float32)
+        else:
+            batch['weights'] = np.ones(batch_size, dtype=np.float32)
+        return batch
+
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """
+        Sets the priorities of sampled transitions (e.g., to their absolute
+        TD errors).
+
+        Parameters
+        ----------
+        indices: np.ndarray
+            The 'indices' of a batch returned by `sample`.
+
+        priorities: np.ndarray
+            The new, non-negative priorities.
+        """
+        if not self.prioritized:
+            raise RuntimeError('the sampler is not prioritized')
+        indices = np.asarray(indices, dtype=np.int64)
+        priorities = np.asarray(priorities, dtype=np.float64)
+        self._max_priority = max(self._max_priority, float(priorities.max()))
+        shards = indices >> _ROW_BITS
+        rows = indices & ((1 << _ROW_BITS) - 1)
+        for i in np.unique(shards):
+            selected = shards == i
+            self._trees[i].update(rows[selected],
+                                  priorities[selected] ** self.alpha)
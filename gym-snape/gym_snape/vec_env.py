@@ -0,0 +1,194 @@
+"""
+A vectorized environment that steps many independent games in one call.
+
+Each of the K games battles ghosts from a shared pool (see `GhostPool`), so
+every game can end its turn whenever it likes. The shops of all games that
+roll in a step, by a roll action or at the start of a new turn, are rolled
+together with `roll_shops`, which draws their pets and food in one vectorized
+operation instead of two small `rng.choice` calls per shop.
+
+Games that are over are reset automatically, so every step returns the first
+observation of the next game for them (the last observation of the game that
+ended is in `info['final_observation']`).
+
+Example
+----------
+>>> env = SnapeVecEnv(n_envs=64)
+>>> obs = env.reset(seed=0)
+>>> for _ in range(1000):
+...     actions = agent.select_actions(obs, env.action_masks())
+...     obs, rewards, dones, info = env.step(actions)
+"""
+
+__all__ = ['SnapeVecEnv']
+
+# Standard library imports
+from typing import List, Optional
+
+# Local application imports
+from gym_snape.env import Snape
+from gym_snape.game.ghosts import GhostPool, build_game
+from gym_snape.game.shop import roll_shops
+
+# Third party imports
+import gym
+from gym import spaces
+import numpy as np
+
+
+class SnapeVecEnv(gym.Env):
+    """
+    K games, each with flat observations, stepped with one action each.
+
+    Parameters
+    ----------
+    n_envs: int
+        The number of games. Default is 8.
+
+    ghost_pool: GhostPool | None
+        The pool of ghosts that every game records its decks into and battles
+        against. If None (default), a new pool is created. Until the pool has
+        a ghost of a game's turn or an earlier one, that game battles its own
+        deck (see `Snape.assign_ghost_pool`).
+
+    Attributes
+    ----------
+    envs: List[Snape]
+        The environments of the games. Agents that need an environment
+        should be given these, but they must not be stepped directly.
+    """
+    metadata = {'render.modes': ['ansi']}
+
+    def __init__(self, n_envs: int = 8,
+                 ghost_pool: Optional[GhostPool] = None):
+        super().__init__()
+        if type(n_envs) != int:
+            raise TypeError('n_envs must be an integer value')
+        if n_envs < 1:
+            raise ValueError('n_envs must be at least 1')
+        self.n_envs = n_envs
+        if ghost_pool is None:
+            ghost_pool = GhostPool()
+        self.ghost_pool = ghost_pool
+
+        # Actions are checked here, once for all games
+        self.envs: List[Snape] = [
+            Snape(ghost_pool=ghost_pool, obs_mode='flat', validation='off')
+            for _ in range(n_envs)
+        ]
+        env = self.envs[0]
+        self.roll_action = env.roll_action
+        self.end_turn_action = env.end_turn_action
+        self.rng = np.random.default_rng()
+
+        self.action_space = spaces.MultiDiscrete(
+            [env.action_space.n] * n_envs)
+        self.observation_space = spaces.Box(
+            low=np.stack([env.observation_space.low] * n_envs),
+            high=np.stack([env.observation_space.high] * n_envs),
+            dtype=env.observation_space.dtype
+        )
+
+    def action_masks(self) -> np.ndarray:
+        """Returns the legal actions of all games as a boolean array of shape
+        (n_envs, number of actions) (see `Snape.action_mask`)."""
+        return np.stack([env.action_mask() for env in self.envs])
+
+    def step(self, actions):
+        """
+        Parameters
+        ----------
+        actions: array_like
+            One action per game.
+
+        Returns
+        ----------
+        The (n_envs, FLAT_OBS_SIZE) observations, a (n_envs,) array of
+        rewards, a (n_envs,) array of done flags, and a dict of diagnostic
+        information. Rewards are the same as those of `Snape.step`.
+        `info['success']` flags whether each action had its intended effect,
+        and `info['final_observation']` holds the last observation of every
+        game, before the games that are done were reset.
+        """
+        actions = np.asarray(actions)
+        assert self.action_space.contains(actions), \
+            f'Actions {actions} are invalid; action space is {self.action_space}'
+
+        success = np.zeros(self.n_envs, dtype=bool)
+        rolled = []  # the games whose shops roll this step
+        new_turns = []  # the games that start a new turn this step
+        for i, (env, action) in enumerate(zip(self.envs, actions.tolist())):
+            game = env.game
+            if action == self.roll_action:
+                if game._pay_for_roll():
+                    rolled.append(game)
+                success[i] = game.success
+            elif action == self.end_turn_action:
+                # Battle a ghost, or the game's own deck if the pool has no
+                # ghost yet (see `Snape.assign_ghost_pool`). The shop of the
+                # new turn is rolled with the others
+                ghost = self.ghost_pool.sample(game.turn, game.trophies)
+                own_ghost = self.ghost_pool.add(game)
+                if ghost is None:
+                    ghost = own_ghost
+                game.challenge(build_game(ghost), roll=False)
+                success[i] = game.success
+                if not game.game_over:
+                    rolled.append(game)
+                    new_turns.append(game)
+            else:
+                success[i] = env._apply_action(action)
+
+        roll_shops([game.shop for game in rolled], self.rng)
+        for game in rolled:
+            game._claim_shop_pets()
+        for game in new_turns:
+            game._turn_start()
+
+        observations = np.stack([env._get_obs() for env in self.envs])
+        rewards = np.full(self.n_envs, -1, dtype=np.float32)
+        dones = np.zeros(self.n_envs, dtype=bool)
+        for i, env in enumerate(self.envs):
+            # Extra reward for game won or lost
+            if env.game.won:
+                rewards[i] = 100
+            elif env.game.lost:
+                rewards[i] = -100
+            dones[i] = env.game.game_over
+
+        info = {'success': success, 'final_observation': observations}
+        if dones.any():
+            observations = observations.copy()
+            for i in np.flatnonzero(dones):
+                observations[i] = self.envs[i].reset()
+
+        return observations, rewards, dones, info
+
+    def reset(self, seed: Optional[int] = None):
+        """
+        Resets all games in place and returns their initial observations.
+
+        Parameters
+        ----------
+        seed: int | None
+            If given, the shop of game i is reseeded with `seed + i`, and the
+            batched rolls are seeded with `seed` as well.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        return np.stack([
+            env.reset(None if seed is None else seed + i)
+            for i, env in enumerate(self.envs)
+        ])
+
+    def render(self, mode='ansi'):
+        if mode == 'ansi':
+            for i, env in enumerate(self.envs):
+                print(f'GAME {i + 1}')
+                env.render(mode)
+        else:
+            super().render(mode=mode)
+
+    def close(self):
+        for env in self.envs:
+            env.close()
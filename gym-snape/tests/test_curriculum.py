@@ -0,0 +1,36 @@
+# Third party imports
+from gym_snape.game import Game
+from gym_snape.game.curriculum import StartStateGenerator
+from gym_snape.game.utils import MatchResult
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('turn', [1, 2, 5, 11, 20, 40])
+def test_match_history_covers_every_past_turn(turn):
+    """A game generated at a turn has one match result per past turn, even
+    when more battles were won or lost than the game allows."""
+    np.random.seed(turn)
+    generator = StartStateGenerator(seed=turn)
+    for _ in range(20):
+        game = generator.sample(turn)
+        history = list(game._match_history)
+        assert len(history) == turn - 1
+        assert history.count(MatchResult.WON) == game.trophies
+        assert history.count(MatchResult.LOST) == 10 - game.lives
+        assert not game.game_over
+
+
+def test_shop_is_rolled_once():
+    """Filling a game with a seed rolls its shop once, at the chosen turn, so
+    the shop is the same as that of a game rolled at that turn."""
+    np.random.seed(0)
+    game = Game()
+    StartStateGenerator(seed=0).fill(game, turn=5, seed=1)
+
+    expected = Game()
+    expected.reset(1, roll=False)
+    expected.shop.turn = 5
+    expected.shop.roll()
+    assert [type(item) for item, _ in game.shop] == \
+        [type(item) for item, _ in expected.shop]
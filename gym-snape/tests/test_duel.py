@@ -0,0 +1,23 @@
+# Third party imports
+from gym_snape.duel import SnapeDuel
+import numpy as np
+
+
+def test_step_with_array_of_actions():
+    """Actions may be given as a NumPy array, as batched agents return them,
+    and have the same effect as plain integers."""
+    np.random.seed(0)
+    rng = np.random.default_rng(0)
+    env = SnapeDuel()
+    env.reset()
+
+    for _ in range(200):
+        masks = env.action_masks()
+        actions = np.array([rng.choice(np.flatnonzero(m)) for m in masks])
+        _, _, done, info = env.step(actions)
+        # Every legal action of a shopping player has its intended effect
+        for i in range(2):
+            if actions[i] != env.end_turn_action:
+                assert info['success'][i]
+        if done:
+            break
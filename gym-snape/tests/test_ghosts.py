@@ -0,0 +1,20 @@
+# Third party imports
+from gym_snape import Snape
+from gym_snape.game.ghosts import GhostPool
+from gym_snape.game.utils import MatchResult
+import numpy as np
+
+
+def test_empty_pool_gives_a_mirror_match():
+    """With no ghost in the pool, the game battles its own deck rather than
+    winning against an empty one. A single turn 1 pet against itself always
+    draws."""
+    np.random.seed(0)
+    env = Snape(ghost_pool=GhostPool(seed=0))
+    env.reset(0)
+    buy = env.buy_actions.start  # shop slot 0 to deck slot 0
+    assert env.action_mask()[buy]
+    env.step(buy)
+    env.step(env.end_turn_action)
+    assert list(env.game._match_history) == [MatchResult.DRAW]
+    assert len(env.ghost_pool) == 1
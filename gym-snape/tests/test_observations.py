@@ -0,0 +1,55 @@
+# Third party imports
+from gym_snape import Snape
+import numpy as np
+import pytest
+
+
+def full_obs(env: Snape):
+    """Returns the observation of the environment, with every slot encoded
+    again, and leaves the environment's encodings untouched."""
+    flat_obs, flat_keys = env._flat_obs, env._flat_keys
+    dict_slots, dict_keys = env._dict_slots, env._dict_keys
+    env._flat_obs = np.zeros_like(flat_obs)
+    env._flat_keys = [None] * len(flat_keys)
+    env._dict_slots = [None] * len(dict_slots)
+    env._dict_keys = [None] * len(dict_keys)
+    try:
+        return env._get_obs()
+    finally:
+        env._flat_obs, env._flat_keys = flat_obs, flat_keys
+        env._dict_slots, env._dict_keys = dict_slots, dict_keys
+
+
+@pytest.mark.parametrize('obs_mode', ['flat', 'dict'])
+@pytest.mark.parametrize('seed', range(40))
+def test_incremental_obs_matches_full_encoding(obs_mode, seed):
+    """Over random play, the observations returned by `step`, which only
+    encode the slots that changed, match a full encoding of the game."""
+    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
+    envs = Snape(obs_mode=obs_mode), Snape(obs_mode=obs_mode)
+    envs[0].assign_opponent(envs[1])
+    envs[1].assign_opponent(envs[0])
+    for i, env in enumerate(envs):
+        env.reset(2 * seed + i)
+
+    for step in range(1000):
+        env = envs[step % 2]
+        # Illegal actions are taken as well, half of the time
+        legal = np.flatnonzero(env.action_mask())
+        if rng.random() < 0.5:
+            action = int(legal[rng.integers(len(legal))])
+        else:
+            action = int(rng.integers(env.action_space.n))
+        try:
+            obs, _, done, _ = env.step(action)
+        except (AttributeError, TypeError):
+            # Some abilities fail in some states, independently of the
+            # observations; the game cannot go on from there
+            break
+        if obs_mode == 'flat':
+            np.testing.assert_array_equal(obs, full_obs(env))
+        else:
+            assert obs == full_obs(env)
+        if done:
+            break
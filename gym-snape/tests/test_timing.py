@@ -0,0 +1,24 @@
+# Standard library imports
+from copy import deepcopy
+import pickle
+
+# Third party imports
+from gym_snape import Snape
+import numpy as np
+
+
+def test_timed_game_can_be_pickled_and_copied():
+    """Timing wrappers are left out of pickles and copies of a game, which
+    play on untimed, while the original game is still timed."""
+    np.random.seed(0)
+    env = Snape(timing=True)
+    env.reset(0)
+    game = env.game
+
+    for copy in (pickle.loads(pickle.dumps(game)), deepcopy(game)):
+        assert 'roll' not in vars(copy)
+        assert copy.to_bytes() == game.to_bytes()
+        copy.roll()
+
+    game.roll()
+    assert env.timer.lap()['roll']['calls'] == 1
@@ -0,0 +1,200 @@
+"""
+Plays many games between two agents in parallel and reports the results.
+
+Each game is played by a worker process between two cross-wired environments,
+with its own seed, so any single game can be replayed by its seed. Per-game
+results are written to a NumPy `.npy` file of structured records (load them
+with `np.load`).
+
+Example
+----------
+>>> python run_matches.py --p1 masked --p2 rbc --games 1000 --output out.npy
+"""
+
+# Standard library imports
+from argparse import ArgumentParser
+from multiprocessing import Pool
+import os
+import time
+from typing import Optional, Tuple
+
+# Local application imports
+from agents.random import MaskedRandom, Random
+from agents.rbc import RuleBasedController as RBC
+from gym_snape import Snape
+
+# Third party imports
+import numpy as np
+
+AGENTS = {
+    'random': Random,
+    'masked': MaskedRandom,
+    'rbc': RBC,
+}
+
+# How a game ended
+FINISHED, MAX_ACTIONS, ERROR = 0, 1, 2
+
+# Winner is 1 or 2 for player 1 or 2, and 0 if the game was not won
+RESULT_DTYPE = np.dtype([
+    ('seed', '<i8'),
+    ('winner', 'u1'),
+    ('status', 'u1'),
+    ('steps', '<u4'),
+    ('turns', '<u2'),
+    ('p1_trophies', 'u1'),
+    ('p1_lives', 'i1'),
+    ('p2_trophies', 'u1'),
+    ('p2_lives', 'i1'),
+    ('seconds', '<f4'),
+])
+
+
+def make_agent(name: str, env: Snape, seed: int):
+    """Creates an agent of the named type, seeded if the type allows it."""
+    if name == 'masked':
+        return MaskedRandom(env, seed=seed)
+    env.action_space.seed(seed)
+    return AGENTS[name](env)
+
+
+def play(seed: int, p1_type: str, p2_type: str,
+         max_actions: Optional[int]) -> Tuple[Snape, Snape, int, int]:
+    """
+    Plays one game between two cross-wired environments.
+
+    Parameters
+    ----------
+    seed: int
+        The seed of the game. Player 1's shop is seeded with `seed`, and
+        player 2's with `seed + 1`.
+    p1_type: str
+        The agent type of player 1 (see `AGENTS`).
+    p2_type: str
+        The agent type of player 2 (see `AGENTS`).
+    max_actions: int | None
+        The max number of actions per player. None means the agents compete
+        until one wins.
+
+    Returns
+    ----------
+    The environments of both players, the number of steps each player took,
+    and how the game ended (`FINISHED`, `MAX_ACTIONS`, or `ERROR`).
+    """
+    # Abilities draw from NumPy's global generator
+    np.random.seed(seed % 2**32)
+    env1, env2 = Snape(), Snape()
+    env1.assign_opponent(env2)
+    env2.assign_opponent(env1)
+    obs1 = env1.reset(seed)
+    obs2 = env2.reset(seed + 1)
+    p1 = make_agent(p1_type, env1, seed)
+    p2 = make_agent(p2_type, env2, seed + 1)
+
+    steps, status = 0, FINISHED
+    done = False
+    while not done:
+        if max_actions is not None and steps >= max_actions:
+            status = MAX_ACTIONS
+            break
+        try:
+            obs1, _, done1, _ = env1.step(int(p1.select_action(obs1)))
+            obs2, _, done2, _ = env2.step(int(p2.select_action(obs2)))
+        except Exception:
+            # Counted apart from finished games in the summary
+            status = ERROR
+            break
+        steps += 1
+        done = done1 or done2
+    return env1, env2, steps, status
+
+
+def play_game(task) -> tuple:
+    """
+    Plays one game and returns its result as a record of `RESULT_DTYPE`.
+
+    Parameters
+    ----------
+    task: tuple
+        The seed, the agent types of both players, and the maximum number of
+        actions per player (None for no limit).
+    """
+    seed, p1_type, p2_type, max_actions = task
+    start = time.perf_counter()
+    env1, env2, steps, status = play(seed, p1_type, p2_type, max_actions)
+
+    winner = 0
+    if env1.game.won or env2.game.lost:
+        winner = 1
+    elif env2.game.won or env1.game.lost:
+        winner = 2
+
+    return (seed, winner, status, steps, env1.game.turn,
+            env1.game.trophies, env1.game.lives,
+            env2.game.trophies, env2.game.lives,
+            time.perf_counter() - start)
+
+
+def main(p1_type: str, p2_type: str, n_games: int, n_workers: int,
+         seed: int, max_actions: Optional[int], output: Optional[str]):
+    """
+    Parameters
+    ----------
+    p1_type: str
+        The agent type of player 1 (see `AGENTS`).
+    p2_type: str
+        The agent type of player 2 (see `AGENTS`).
+    n_games: int
+        The number of games to play.
+    n_workers: int
+        The number of worker processes.
+    seed: int
+        The seed of the first game; game i is played with seed `seed + 2*i`.
+    max_actions: int | None
+        The max number of actions per player per game. Default is None, which
+        means the agents compete until one wins.
+    output: str | None
+        Path of the `.npy` file to write the per-game results to.
+    """
+    tasks = [(seed + 2*i, p1_type, p2_type, max_actions)
+             for i in range(n_games)]
+    chunksize = max(1, n_games // (4 * n_workers))
+
+    start = time.perf_counter()
+    with Pool(n_workers) as pool:
+        records = list(pool.imap_unordered(play_game, tasks, chunksize))
+    elapsed = time.perf_counter() - start
+
+    results = np.array(records, dtype=RESULT_DTYPE)
+    results.sort(order='seed')
+    if output:
+        np.save(output, results)
+
+    n_steps = 2 * int(results['steps'].sum())
+    print(f'{p1_type} (player 1) vs. {p2_type} (player 2), '
+          f'{n_games} games on {n_workers} workers')
+    print(f'games/s:          {n_games / elapsed:12,.1f}')
+    print(f'steps/s:          {n_steps / elapsed:12,.1f}')
+    print(f'player 1 wins:    {np.mean(results["winner"] == 1):12.1%}')
+    print(f'player 2 wins:    {np.mean(results["winner"] == 2):12.1%}')
+    print(f'undecided:        {np.mean(results["winner"] == 0):12.1%}')
+    print(f'mean steps:       {results["steps"].mean():12.1f}')
+    print(f'mean turns:       {results["turns"].mean():12.1f}')
+    print(f'hit max actions:  {np.sum(results["status"] == MAX_ACTIONS):12d}')
+    print(f'errors:           {np.sum(results["status"] == ERROR):12d}')
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Play many games between two agents in parallel.')
+    parser.add_argument('--p1', choices=list(AGENTS.keys()), default='masked')
+    parser.add_argument('--p2', choices=list(AGENTS.keys()), default='masked')
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max_actions', type=int, default=10_000)
+    parser.add_argument('--output', help='write per-game results to this file')
+    args = parser.parse_args()
+
+    main(args.p1, args.p2, args.games, args.workers, args.seed,
+         args.max_actions, args.output)